@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+keyword/ 目录批量分类
+
+找出 keyword/ 下的全部工作簿，每个输入在 result/ 下写出一个结果文件（默认 CSV，见 keyword_engine.sinks）：
+- 读取（openpyxl 解码）和写出在线程池里进行，多个文件同时读写；
+- 结果逐批追加写入结果文件，需要 xlsx 时加 --xlsx 由结果文件另行导出；
+- 分类是 CPU 密集的，按批提交到进程池，工作进程各自加载一次规则；
+- 工作进程先查分类结果缓存（keyword_engine.cache），只对没见过的关键词分类，--no-cache 关闭；
+- 所有文件共用一个在途批次上限，读得再快也不会把整个文件堆在内存里；
+- 每个文件一行汇总（行数、耗时、状态），有文件失败时退出码为 1。
+
+每个文件按文件名选分类方式（FILE_PROFILES），其余用 --engine 指定的方式。在仓库根目录执行：
+    python src/batch.py
+    python src/batch.py --engine c1 --workers 8 --json ./result/batch_summary.json
+    python src/batch.py --format parquet --xlsx
+    python src/batch.py keyword/品牌词.xlsx keyword/Java.xlsx
+"""
+import argparse
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from keyword_engine.dedup import classify_unique
+from keyword_engine.excel_io import KEYWORD_COLUMN, iter_keyword_batches
+from keyword_engine.normalize import normalize_keyword
+from keyword_engine.sinks import DEFAULT_FORMAT, RESULT_FORMATS, export_xlsx, open_sink
+
+DEFAULT_INPUT_DIR = "./keyword"
+DEFAULT_OUTPUT_DIR = "./result"
+# 每批关键词数：批太大时进程池里任务太少，读写和分类难以交错
+DEFAULT_BATCH_SIZE = 2000
+
+
+class Profile(NamedTuple):
+    """
+    一种分类方式
+
+    columns - 结果表的列（第一列为关键词）
+    output  - 结果文件名模板（不含扩展名），{stem} 为输入文件名（不含扩展名）
+    grouped - 导出 xlsx 时是否按最后一列分组写入各工作表
+    """
+    columns: Tuple[str, ...]
+    output: str
+    grouped: bool = False
+
+
+PROFILES: Dict[str, Profile] = {
+    "classify_keyword": Profile(("关键词", "分类"), "{stem}"),
+    "c1": Profile(("关键词", "分类"), "{stem}"),
+    "软件开发": Profile(("关键词", "成交意向", "词性分类"), "{stem}"),
+    "品牌分组": Profile(("关键词", "分组"), "{stem}_分组结果", grouped=True),
+}
+# 输入文件名（不含扩展名） -> 分类方式，与各脚本原来处理的文件一致
+FILE_PROFILES = {
+    "品牌词": "品牌分组",
+    "软件开发": "软件开发",
+}
+# 分类方式 -> 所用引擎（keyword_engine.engines），其余分类方式与引擎同名
+PROFILE_ENGINES = {"品牌分组": "c2"}
+
+
+# ---- 工作进程 ----
+
+# 工作进程内已加载的批量分类函数
+_worker_classifiers: Dict[Tuple[str, bool], Callable[[List[str]], list]] = {}
+
+
+def _load_classifier(profile: str, cached: bool) -> Callable[[List[str]], list]:
+    """分类方式 -> 批量分类函数，返回每个关键词一行（不含关键词本身）"""
+    from keyword_engine.engines import get_cached_engine, get_engine
+
+    if cached:
+        classify_many = get_cached_engine(PROFILE_ENGINES.get(profile, profile)).classify_many
+    elif profile == "软件开发":
+        classify_many = importlib.import_module("软件开发").classify_labels
+    elif profile == "品牌分组":
+        classify_many = importlib.import_module("c2").classify_list
+    else:
+        engine = get_engine(profile)
+
+        def classify_many(keywords):
+            return classify_unique(keywords, lambda uniques: [engine(kw) for kw in uniques], normalize=normalize_keyword)
+
+    if profile == "软件开发":
+        return lambda keywords: [list(labels) for labels in classify_many(keywords)]
+    if profile == "品牌分组":
+        return lambda keywords: [[group] for group in classify_many(keywords)]
+    return lambda keywords: [
+        [result if isinstance(result, str) else "|".join(result)] for result in classify_many(keywords)
+    ]
+
+
+def _mp_context():
+    # 工作进程在读写线程运行时才创建，直接 fork 会把线程持有的锁（导入锁、openpyxl 等）一起复制过去，
+    # 子进程可能永远卡住；改从干净的 forkserver 派生（没有时用 spawn）
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _classify_batch(profile: str, keywords: List[str], cached: bool = True) -> list:
+    key = (profile, cached)
+    classify_many = _worker_classifiers.get(key)
+    if classify_many is None:
+        classify_many = _worker_classifiers[key] = _load_classifier(profile, cached)
+    return classify_many(keywords)
+
+
+# ---- 读写线程 ----
+
+class FileSummary(NamedTuple):
+    source: str
+    output: str
+    profile: str
+    rows: int
+    seconds: float
+    status: str
+    error: str = ""
+
+
+class BatchRunner:
+    """
+    多文件批量分类
+
+    参数：
+    workers      - 分类进程数（默认CPU核数）
+    io_threads   - 读写线程数，即同时处理的文件数（默认 min(4, 文件数)）
+    max_inflight - 所有文件合计的在途批次上限（默认进程数的两倍）
+    batch_size   - 每批关键词数
+    engine       - FILE_PROFILES 之外的文件使用的分类方式
+    column       - 关键词列表头
+    fmt          - 结果文件格式：csv / jsonl / parquet
+    xlsx         - 写完结果文件后是否另外导出 xlsx
+    cached       - 是否使用分类结果缓存
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        io_threads: Optional[int] = None,
+        max_inflight: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        engine: str = "classify_keyword",
+        column: str = KEYWORD_COLUMN,
+        fmt: str = DEFAULT_FORMAT,
+        xlsx: bool = False,
+        cached: bool = True
+    ):
+        if engine not in PROFILES:
+            raise ValueError(f"unknown engine {engine!r}, expected one of: {', '.join(PROFILES)}")
+        self.workers = workers or os.cpu_count() or 1
+        self.io_threads = io_threads
+        self.max_inflight = max_inflight or 2 * self.workers
+        self.batch_size = batch_size
+        self.engine = engine
+        self.column = column
+        if fmt not in RESULT_FORMATS:
+            raise ValueError(f"unsupported format {fmt!r}, expected one of: {', '.join(RESULT_FORMATS)}")
+        self.fmt = fmt
+        self.xlsx = xlsx
+        self.cached = cached
+
+    def profile_for(self, source: str) -> str:
+        stem = os.path.splitext(os.path.basename(source))[0]
+        return FILE_PROFILES.get(stem, self.engine)
+
+    def run(self, sources: List[str], output_dir: str = DEFAULT_OUTPUT_DIR,
+            on_done: Optional[Callable[[FileSummary], None]] = None) -> List[FileSummary]:
+        """处理全部文件，返回与 sources 顺序一致的汇总；on_done 在每个文件完成时（在调用线程里）调用"""
+        os.makedirs(output_dir, exist_ok=True)
+        slots = threading.BoundedSemaphore(self.max_inflight)
+        io_threads = self.io_threads or min(4, len(sources)) or 1
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context()) as pool, \
+                ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix="batch-io") as io:
+            futures = {io.submit(self._run_file, source, output_dir, pool, slots): i for i, source in enumerate(sources)}
+            summaries: List[Optional[FileSummary]] = [None] * len(sources)
+            # 在调用线程里逐个汇报，on_done 不会被多个线程同时调用
+            for future in as_completed(futures):
+                summary = summaries[futures[future]] = future.result()
+                if on_done:
+                    on_done(summary)
+            return summaries
+
+    def _run_file(self, source: str, output_dir: str, pool, slots) -> FileSummary:
+        profile_name = self.profile_for(source)
+        profile = PROFILES[profile_name]
+        stem = os.path.splitext(os.path.basename(source))[0]
+        output = os.path.join(output_dir, f"{profile.output.format(stem=stem)}.{self.fmt}")
+        start = time.perf_counter()
+        counter = [0]
+        try:
+            with open_sink(output, profile.columns) as sink:
+                for keywords, rows in self._results(source, profile_name, pool, slots, counter):
+                    sink.write_rows([(kw, *row) for kw, row in zip(keywords, rows)])
+            if self.xlsx:
+                export_xlsx(output, group_column=profile.columns[-1] if profile.grouped else None)
+            status, error = "ok", ""
+        except Exception as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+        return FileSummary(source, output, profile_name, counter[0], round(time.perf_counter() - start, 3), status, error)
+
+    def _results(self, source: str, profile: str, pool, slots, counter: list) -> Iterator[Tuple[List[str], list]]:
+        """
+        读一批提交一批，按输入顺序产出 (关键词, 结果行)
+
+        拿不到在途名额时先把本文件最早的一批写出去再重试：名额都被已完成但还没写出的批次
+        占着时，各文件仍能继续往前走，不会互相等死
+        """
+        pending: Deque[Tuple[List[str], object]] = deque()
+
+        def pop():
+            keywords, future = pending.popleft()
+            try:
+                rows = future.result()
+            finally:
+                slots.release()
+            counter[0] += len(keywords)
+            return keywords, rows
+
+        try:
+            for keywords in iter_keyword_batches(source, self.column, self.batch_size):
+                while not slots.acquire(blocking=False):
+                    if pending:
+                        yield pop()
+                    else:
+                        slots.acquire()
+                        break
+                pending.append((keywords, pool.submit(_classify_batch, profile, keywords, self.cached)))
+                while pending and pending[0][1].done():
+                    yield pop()
+            while pending:
+                yield pop()
+        finally:
+            # 中途出错时归还剩余名额
+            for _, future in pending:
+                future.cancel()
+                slots.release()
+
+
+def discover(input_dir: str = DEFAULT_INPUT_DIR) -> List[str]:
+    """目录下的全部工作簿（跳过 Excel 的 ~$ 锁文件），大文件排在前面先开始"""
+    paths = [
+        path for path in glob.glob(os.path.join(input_dir, "*.xlsx"))
+        if not os.path.basename(path).startswith("~$")
+    ]
+    return sorted(paths, key=lambda path: (-os.path.getsize(path), path))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="keyword/ 目录批量分类")
+    parser.add_argument("inputs", nargs="*", help="要处理的工作簿（默认输入目录下全部）")
+    parser.add_argument("--input-dir", default=DEFAULT_INPUT_DIR, help="输入目录")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="输出目录")
+    parser.add_argument("--engine", default="classify_keyword",
+                        help=f"未在 FILE_PROFILES 中的文件使用的分类方式：{','.join(PROFILES)}")
+    parser.add_argument("--workers", type=int, help="分类进程数（默认CPU核数）")
+    parser.add_argument("--io-threads", type=int, help="同时读写的文件数（默认 min(4, 文件数)）")
+    parser.add_argument("--max-inflight", type=int, help="在途批次上限（默认进程数的两倍）")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="每批关键词数")
+    parser.add_argument("--format", choices=RESULT_FORMATS, default=DEFAULT_FORMAT, help="结果文件格式")
+    parser.add_argument("--xlsx", action="store_true", help="另外导出 xlsx（品牌词按分组分表）")
+    parser.add_argument("--no-cache", action="store_true", help="不查、不写分类结果缓存")
+    parser.add_argument("--json", help="把汇总另存为 JSON 文件")
+    args = parser.parse_args(argv)
+    if args.engine not in PROFILES:
+        parser.error(f"未知分类方式：{args.engine}")
+
+    sources = args.inputs or discover(args.input_dir)
+    if not sources:
+        print(f"{args.input_dir} 下没有工作簿")
+        return 0
+    runner = BatchRunner(
+        args.workers, args.io_threads, args.max_inflight, args.batch_size, args.engine,
+        fmt=args.format, xlsx=args.xlsx, cached=not args.no_cache
+    )
+    columns = ["source", "profile", "rows", "seconds", "status", "output"]
+    print("\t".join(columns))
+
+    def report(summary: FileSummary):
+        line = "\t".join(str(getattr(summary, c)) for c in columns)
+        print(f"{line}\t{summary.error}" if summary.error else line, flush=True)
+
+    start = time.perf_counter()
+    summaries = runner.run(sources, args.output_dir, on_done=report)
+    elapsed = time.perf_counter() - start
+    rows = sum(s.rows for s in summaries)
+    failed = [s for s in summaries if s.status != "ok"]
+    print(f"共 {len(summaries)} 个文件、{rows} 行，用时 {elapsed:.2f}s，失败 {len(failed)} 个")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([s._asdict() for s in summaries], f, ensure_ascii=False, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
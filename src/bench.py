@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+分类引擎吞吐基准
+
+用现有词库（KEYWORD_ROOTS、CLASS_RULES、城市×后缀组合、竞品品牌词）按固定随机种子
+合成接近真实导出的关键词语料，逐个引擎测量：
+- 构建耗时
+- 吞吐（关键词/秒）
+- 单个关键词耗时的 p50 / p99（抽样计时）
+- 峰值内存（RSS）
+
+每个引擎在单独的子进程里运行，峰值内存互不干扰。在仓库根目录执行：
+    python src/bench.py --sizes 10k,1m,10m
+    python src/bench.py --engines classify_keyword,KeywordClassifier --json bench.json
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import random
+import sys
+import time
+from array import array
+from itertools import islice
+
+# 每次生成并计时的关键词块大小，语料不整体放进内存
+CHUNK_SIZE = 100000
+# 单个关键词耗时的最大抽样数
+MAX_LATENCY_SAMPLES = 200000
+
+_CN_DIGITS = "零一二三四五六七八九"
+
+
+def _cn_number(n):
+    """20~49 以内的中文数字写法，如 35 -> 三十五"""
+    tens, ones = divmod(n, 10)
+    return (_CN_DIGITS[tens] if tens > 1 else "") + "十" + (_CN_DIGITS[ones] if ones else "")
+
+
+def load_vocabulary():
+    """从各分类脚本的词库汇总语料用词"""
+    roots = importlib.import_module("classify_keyword").KEYWORD_ROOTS
+    class_rules = importlib.import_module("软件开发").CLASS_RULES
+
+    def flatten(groups):
+        return [term for terms in groups.values() for term in terms]
+
+    return {
+        "course": flatten(roots["course"]),
+        "cost": flatten(roots["cost"]),
+        "qualification": flatten(roots["qualification"]),
+        "cities": roots["geo"]["cities"],
+        "suffix": roots["geo"]["suffix"],
+        "brands": roots["competitor"]["brands"],
+        "comparison": roots["competitor"]["comparison"],
+        "negative": flatten(roots["negative"]),
+        "intent": flatten(class_rules["成交意向"]) + flatten(class_rules["词性"]),
+        "filler": ["好吗", "难吗", "前景", "怎么样", "哪里", "报名", "2024", "线上", "自学"],
+    }
+
+
+def generate_corpus(size, seed=0, vocab=None):
+    """
+    逐个产出合成关键词
+
+    结构大致为 [城市[市][后缀]] [品牌] 课程词 [费用/资质/意向/对比词…] [年龄]，
+    再随机加入大小写、空格、全角等写法差异；组合空间有限，和真实导出一样会有重复。
+    """
+    vocab = vocab or load_vocabulary()
+    rng = random.Random(seed)
+    extras = ["cost", "qualification", "intent", "comparison", "filler"]
+    for _ in range(size):
+        parts = []
+        if rng.random() < 0.35:
+            city = rng.choice(vocab["cities"])
+            if rng.random() < 0.2:
+                city += "市"
+            if rng.random() < 0.6:
+                city += rng.choice(vocab["suffix"])
+            parts.append(city)
+        if rng.random() < 0.12:
+            parts.append(rng.choice(vocab["brands"]))
+        parts.append(rng.choice(vocab["course"]))
+        for _ in range(rng.randint(0, 2)):
+            parts.append(rng.choice(vocab[rng.choice(extras)]))
+        if rng.random() < 0.03:
+            parts.append(rng.choice(vocab["negative"]))
+        if rng.random() < 0.05:
+            age = rng.randint(18, 45)
+            parts.append((str(age) if rng.random() < 0.6 else _cn_number(age)) + rng.choice(["岁", "周岁", "岁学"]))
+        text = "".join(parts)
+        r = rng.random()
+        if r < 0.15:
+            text = text.upper()
+        elif r < 0.2:
+            text = " ".join(parts)
+        elif r < 0.23:
+            # 全角字母数字
+            text = "".join(chr(ord(ch) + 0xFEE0) if "!" <= ch <= "~" else ch for ch in text)
+        yield text
+
+
+def build_rules_config(vocab):
+    """DSL 分类器（KeywordClassifier / EnhancedTokenizer）共用的基准配置和通配符"""
+    roots = importlib.import_module("classify_keyword").KEYWORD_ROOTS
+
+    def leaves(groups):
+        return {name: "|".join(terms) for name, terms in groups.items()}
+
+    config = {
+        "否定词": leaves(roots["negative"]),
+        "品牌词": {"竞品": "|".join(vocab["brands"])},
+        "课程": leaves(roots["course"]),
+        "费用": leaves(roots["cost"]),
+        "资质": leaves(roots["qualification"]),
+        "地域": {"城市机构": "{城市}&{后缀}", "城市": "{城市}-{后缀}"},
+        "对比": {"对比": "|".join(vocab["comparison"])},
+    }
+    wildcard = {"城市": vocab["cities"], "后缀": vocab["suffix"]}
+    return config, wildcard
+
+
+def _engine_classify_keyword(vocab):
+    module = importlib.import_module("classify_keyword")
+    patterns = module.build_regex_patterns()
+    return lambda keyword: module.classify_keyword(keyword, patterns)
+
+
+def _engine_c1(vocab):
+    module = importlib.import_module("c1")
+    patterns = module.build_regex_patterns()
+    return lambda keyword: module.classify_keyword(keyword, patterns)
+
+
+def _engine_keyword_classifier(vocab):
+    from keyword_engine.rules import KeywordClassifier
+    config, wildcard = build_rules_config(vocab)
+    return KeywordClassifier(config, wildcard, case_sensitive=False).classify
+
+
+def _engine_enhanced_tokenizer(vocab):
+    module = importlib.import_module("new_classif_keyword")
+    config, wildcard = build_rules_config(vocab)
+    return module.EnhancedTokenizer(config, wildcard, case_sensitive=False).tokenize
+
+
+def _engine_software(vocab):
+    module = importlib.import_module("软件开发")
+    normalize = module.normalize_keyword
+    return lambda keyword: module.classify_cleaned(normalize(keyword))
+
+
+ENGINES = {
+    "classify_keyword": _engine_classify_keyword,
+    "c1": _engine_c1,
+    "KeywordClassifier": _engine_keyword_classifier,
+    "EnhancedTokenizer": _engine_enhanced_tokenizer,
+    "软件开发": _engine_software,
+}
+
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_engine(name, size, seed=0):
+    """在当前进程里跑一个引擎，返回测量结果"""
+    vocab = load_vocabulary()
+    start = time.perf_counter()
+    classify = ENGINES[name](vocab)
+    build_seconds = time.perf_counter() - start
+
+    step = max(1, size // MAX_LATENCY_SAMPLES)
+    latencies = array("d")
+    elapsed = 0.0
+    count = 0
+    perf_counter = time.perf_counter
+    corpus = generate_corpus(size, seed, vocab)
+    while True:
+        chunk = list(islice(corpus, CHUNK_SIZE))
+        if not chunk:
+            break
+        chunk_start = perf_counter()
+        for i, keyword in enumerate(chunk, count):
+            if i % step:
+                classify(keyword)
+            else:
+                t = perf_counter()
+                classify(keyword)
+                latencies.append(perf_counter() - t)
+        elapsed += perf_counter() - chunk_start
+        count += len(chunk)
+
+    samples = sorted(latencies)
+    return {
+        "engine": name,
+        "size": count,
+        "build_s": round(build_seconds, 3),
+        "seconds": round(elapsed, 3),
+        "kw_per_s": round(count / elapsed) if elapsed else 0,
+        "p50_us": round(_percentile(samples, 0.50) * 1e6, 1),
+        "p99_us": round(_percentile(samples, 0.99) * 1e6, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _run_in_child(args):
+    return run_engine(*args)
+
+
+def run_isolated(name, size, seed=0):
+    """在独立子进程中运行，使峰值内存只包含该引擎本身"""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(_run_in_child, ((name, size, seed),))
+
+
+def parse_size(text):
+    """10k / 1m / 10M / 5000 -> 整数"""
+    text = text.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="关键词分类引擎吞吐基准")
+    parser.add_argument("--sizes", default="10k", help="语料规模，逗号分隔，如 10k,1m,10m")
+    parser.add_argument("--engines", default="all", help=f"引擎，逗号分隔：{','.join(ENGINES)}")
+    parser.add_argument("--seed", type=int, default=0, help="语料随机种子")
+    parser.add_argument("--json", help="把结果另存为 JSON 文件")
+    parser.add_argument("--in-process", action="store_true", help="不起子进程（峰值内存为累计值）")
+    args = parser.parse_args(argv)
+
+    engines = list(ENGINES) if args.engines == "all" else args.engines.split(",")
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"未知引擎：{','.join(unknown)}")
+
+    runner = run_engine if args.in_process else run_isolated
+    columns = ["engine", "size", "build_s", "kw_per_s", "p50_us", "p99_us", "peak_rss_mb"]
+    print("\t".join(columns))
+    results = []
+    for size in (parse_size(s) for s in args.sizes.split(",")):
+        for name in engines:
+            result = runner(name, size, args.seed)
+            results.append(result)
+            print("\t".join(str(result[c]) for c in columns), flush=True)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 import re
-from cn2an import cn2an
 from typing import Dict, List, Optional
 
+from keyword_engine.age import scan_age
+from keyword_engine.artifact import load_or_compile
+from keyword_engine.geo import GeoMatcher
+from keyword_engine.hierarchy import HierarchyLabeler
+from keyword_engine.normalize import normalize_keyword
+
 # 详细词根字典（包含二级分类）
 KEYWORD_ROOTS = {
     "course": {
@@ -62,86 +67,51 @@ def build_keyword_regex(
     return re.compile(full_pattern, flags=flags)
 
 def build_regex_patterns():
-    """构建所有正则表达式模式，包含二级分类"""
+    """构建所有匹配模式，包含二级分类"""
     patterns = {}
     
-    # 为每个主类及其子类构建正则
-    for main_category, sub_dict in KEYWORD_ROOTS.items():
-        if main_category == "age_limit":
-            continue
-        if isinstance(sub_dict, dict):
-            # 主类正则：合并所有子类关键词
-            all_terms = []
-            for sub_terms in sub_dict.values():
-                all_terms.extend(sub_terms)
-            patterns[main_category] = build_keyword_regex({main_category: all_terms})
-            # 子类正则
-            for sub_name, terms in sub_dict.items():
-                sub_key = f"{main_category}.{sub_name}"
-                patterns[sub_key] = build_keyword_regex({sub_name: terms})
-        else:
-            # 处理非字典结构（如negative）
-            patterns[main_category] = build_keyword_regex({main_category: sub_dict})
+    # 主类和子类共用一个层级打标器：每个词根只匹配一次，主类命中由子类汇总得到
+    # 词根与关键词用同一个归一化函数处理，匹配时区分大小写即可
+    patterns["labels"] = HierarchyLabeler(KEYWORD_ROOTS, flags=0, normalize=normalize_keyword)
     
-    # 地域类特殊处理（城市+后缀组合）
-    geo_terms = [
-        rf"{city}{suffix}" 
-        for city in KEYWORD_ROOTS["geo"]["cities"] 
-        for suffix in KEYWORD_ROOTS["geo"]["suffix"]
-    ]
-    patterns["geo"] = build_keyword_regex(special_regex=geo_terms)
+    # 地域类特殊处理（城市+后缀组合，城市与后缀紧挨着）
+    patterns["geo"] = GeoMatcher(
+        KEYWORD_ROOTS["geo"]["cities"], KEYWORD_ROOTS["geo"]["suffix"],
+        connectors="", flags=0, normalize=normalize_keyword,
+    )
     
-    # 年龄检测正则
-    age_pattern = r"""(?xi)
-    (?:年[龄纪]|岁)[\s：:]*(?:约|大概)?(\d{1,2}|[零一二两三四五六七八九十廿卅]+)|
-    (\d{1,2}|[零一二两三四五六七八九十廿卅]+)[\s：:]*(?:约|大概)?(?:个?[周岁]|岁)
-    """
-    patterns["age_check"] = re.compile(age_pattern)
+    # 年龄检测见 keyword_engine.age.scan_age（关键词任意位置，与原 age_check 正则一致）
     
     return patterns
 
-def parse_age(match):
-    """解析年龄匹配结果"""
-    groups = match.groups()
-    for g in groups:
-        if g and g.isdigit():
-            return int(g)
-        elif g:
-            return cn2an(g, mode="smart")
-    return 0
-
 def classify_keyword(keyword: str, patterns: Dict[str, re.Pattern]) -> List[str]:
     """多级分类关键词"""
+    keyword = normalize_keyword(keyword)
+    labeler = patterns["labels"]
+    hits = labeler.scan(keyword)
+    
     # 否定词优先
-    if patterns["negative"].search(keyword):
+    if labeler.has(hits, "negative"):
         return ["negative"]
     
     # 年龄检查
-    age_match = patterns["age_check"].search(keyword)
+    age_match = scan_age(keyword)
     if age_match:
-        age = parse_age(age_match)
+        age = age_match.value
         if age > KEYWORD_ROOTS["age_limit"]:
             return ["age_limit"]
     
     # 竞品类处理
-    if patterns["competitor"].search(keyword):
+    if labeler.has(hits, "competitor"):
         return ["competitor"]
     
-    classifications = []
-    matched_parents = set()
-    
-    # 检查所有可能的子类
-    for pattern_key in patterns:
-        if '.' in pattern_key and patterns[pattern_key].search(keyword):
-            classifications.append(pattern_key)
-            main_cat = pattern_key.split('.')[0]
-            matched_parents.add(main_cat)
+    # 子类命中
+    classifications = labeler.leaves(hits)
+    matched_parents = set(labeler.rollup(hits))
     
-    # 检查未被子类覆盖的主类
-    main_categories = ["geo", "course", "cost", "qualification"]
-    for main_cat in main_categories:
-        if main_cat not in matched_parents and patterns[main_cat].search(keyword):
-            classifications.append(main_cat)
+    # 检查未被子类覆盖的主类（只有地域组合正则可能单独命中主类）
+    if "geo" not in matched_parents and patterns["geo"].search(keyword):
+        classifications.append("geo")
     
     # 弱意向处理
     if not classifications and any(q in keyword for q in ["好吗", "难吗", "前景"]):
@@ -160,8 +130,10 @@ test_keywords = [
     "大数据开发课程"
 ]
 
-patterns = build_regex_patterns()
-for kw in test_keywords:
-    print(f"关键词：{kw}")
-    print(f"分类结果：{classify_keyword(kw, patterns)}")
-    print("-" * 50)
+# 规则产物按源码哈希缓存，源码不变时直接加载
+if __name__ == "__main__":
+    patterns = load_or_compile(build_regex_patterns)
+    for kw in test_keywords:
+        print(f"关键词：{kw}")
+        print(f"分类结果：{classify_keyword(kw, patterns)}")
+        print("-" * 50)
@@ -1,33 +1,104 @@
-import pandas as pd
 import re
 
-def classify_keyword(keyword):
+from keyword_engine.cache import CachedClassifier, code_fingerprint, engine_fingerprint, ruleset_hash
+from keyword_engine.dedup import classify_unique_series
+from keyword_engine.manifest import ChangeManifest
+from keyword_engine.normalize import normalize_keyword, normalize_series
+from keyword_engine.sinks import DEFAULT_FORMAT, RESULT_FORMATS, export_xlsx, write_row_batches
+
+# 分组规则：(分组, 需全部命中的正则, 不能命中的正则)，按优先级排列，命中第一条即停止
+GROUP_RULES = [
     # 高成交-品牌词
-    if re.search(r'(课程|培训|学费|招生|专业|就业)', keyword) and not re.search(r'(吗|么|怎么|如何|哪)', keyword):
-        return '高成交-品牌词'
+    ('高成交-品牌词', [r'(?:课程|培训|学费|招生|专业|就业)'], [r'(?:吗|么|怎么|如何|哪)']),
     # 高成交-费用查询
-    elif re.search(r'(学费|价格|多少钱|收费|贵不贵)', keyword):
-        return '高成交-费用查询'
+    ('高成交-费用查询', [r'(?:学费|价格|多少钱|收费|贵不贵)'], []),
     # 中成交-课程咨询
-    elif re.search(r'(课程|专业|就业|培训|学什么)', keyword) and re.search(r'(吗|么|怎么|如何)', keyword):
-        return '中成交-课程咨询'
+    ('中成交-课程咨询', [r'(?:课程|专业|就业|培训|学什么)', r'(?:吗|么|怎么|如何)'], []),
     # 低成交-评价类
-    elif re.search(r'(怎么样|好吗|靠谱吗|口碑|如何)', keyword):
-        return '低成交-评价类'
+    ('低成交-评价类', [r'(?:怎么样|好吗|靠谱吗|口碑|如何)'], []),
     # 低成交-信息查询
-    elif re.search(r'(地址|路线|校区|电话|官网|怎么去)', keyword):
-        return '低成交-信息查询'
-    else:
-        return '无效词'
+    ('低成交-信息查询', [r'(?:地址|路线|校区|电话|官网|怎么去)'], []),
+]
+DEFAULT_GROUP = '无效词'
+
+def classify_keyword(keyword):
+    keyword = normalize_keyword(keyword)
+    for group, includes, excludes in GROUP_RULES:
+        if all(re.search(p, keyword) for p in includes) and not any(re.search(p, keyword) for p in excludes):
+            return group
+    return DEFAULT_GROUP
+
+def classify_batch(series):
+    """
+    整列批量分类，结果与逐行 classify_keyword 一致
+
+    先归一化并去重，每条正则只在不同的关键词上向量化匹配一次，
+    按规则优先级用布尔掩码决定分组后再广播回每一行（空值按未命中处理）
+    """
+    return classify_unique_series(series, select_groups, normalize=normalize_series, default=DEFAULT_GROUP)
+
+def select_groups(normalized):
+    """对已归一化的关键词列按规则优先级选出分组"""
+    import numpy as np
+
+    masks = {}
 
-# 读取Excel文件
-df = pd.read_excel('./keyword/品牌词.xlsx')
+    def contains(pattern):
+        if pattern not in masks:
+            masks[pattern] = normalized.str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool)
+        return masks[pattern]
 
-# 分类关键词
-df['分组'] = df['关键词'].apply(classify_keyword)
+    conditions = []
+    for _, includes, excludes in GROUP_RULES:
+        cond = np.ones(len(normalized), dtype=bool)
+        for p in includes:
+            cond &= contains(p)
+        for p in excludes:
+            cond &= ~contains(p)
+        conditions.append(cond)
+    return np.select(conditions, [group for group, _, _ in GROUP_RULES], default=DEFAULT_GROUP)
 
-# 保存结果到新文件
-with pd.ExcelWriter('./result/品牌词_分组结果.xlsx') as writer:
-    for group in df['分组'].unique():
-        group_df = df[df['分组'] == group]
-        group_df.to_excel(writer, sheet_name=group, index=False)
+def classify_frames(batches):
+    """逐批分类，产出带分组列的 DataFrame"""
+    import pandas as pd
+
+    for batch in batches:
+        keywords = pd.Series(batch, name='关键词')
+        yield pd.DataFrame({'关键词': keywords, '分组': classify_batch(keywords)})
+
+def classify_list(keywords):
+    import pandas as pd
+
+    return classify_batch(pd.Series(keywords, dtype=object)).tolist()
+
+def build_cached_classifier(cache=None):
+    """带持久缓存的分组（未命中的关键词整批向量化分类），规则或 keyword_engine 引擎改动后缓存自动失效"""
+    ruleset = ruleset_hash('c2', code_fingerprint(classify_keyword), engine_fingerprint())
+    return CachedClassifier(classify_keyword, ruleset, cache, normalize=normalize_keyword, batch=classify_list)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='品牌词分组')
+    parser.add_argument('--format', choices=RESULT_FORMATS, default=DEFAULT_FORMAT, help='结果文件格式')
+    parser.add_argument('--xlsx', action='store_true', help='另外导出按分组分表的 xlsx')
+    parser.add_argument('--no-cache', action='store_true', help='不查、不写分类结果缓存')
+    args = parser.parse_args()
+
+    # 流式读取 -> 只对新增或改动的行分类 -> 与已存结果合并后连同原表各列逐批追加写出
+    source, output = './keyword/品牌词.xlsx', f'./result/品牌词_分组结果.{args.format}'
+    with ChangeManifest() as manifest:
+        stats = manifest.update_file(
+            source, output,
+            ruleset=ruleset_hash(code_fingerprint(classify_batch), engine_fingerprint()),
+            classify_many=classify_list if args.no_cache else build_cached_classifier().classify_many,
+            write=lambda header, batches: write_row_batches(
+                output, header, ('分组',), ((rows, ([group] for group in groups)) for rows, groups in batches)
+            ),
+        )
+    if stats is None:
+        print('关键词文件和规则均未变化，跳过')
+    else:
+        print(f"新分类 {stats['classified']}/{stats['rows']} 行")
+    if args.xlsx:
+        export_xlsx(output, group_column='分组')
@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 import re
-# 如需支持"三十五岁"的识别，可添加以下处理：
-from cn2an import cn2an
 from typing import Dict, List, Optional
+
+from keyword_engine.age import scan_age
+from keyword_engine.artifact import load_or_compile
+from keyword_engine.automaton import KeywordMatcher
+from keyword_engine.cache import CachedClassifier, code_fingerprint, engine_fingerprint, ruleset_hash
+from keyword_engine.geo import GeoMatcher
+from keyword_engine.normalize import normalize_keyword
 # 详细词根字典（新增行业扩展词）
 KEYWORD_ROOTS = {
     # 课程类（扩展技术栈维度）
@@ -115,34 +120,23 @@ def build_keyword_regex(
         
     return re.compile(full_pattern, flags=flags)
 
+# 弱意向词（未命中任何类别时归入资质类）
+WEAK_INTENT_TERMS = ["好吗", "难吗", "前景"]
+
 def build_regex_patterns():
-    """构建正则表达式匹配模式"""
+    """构建正则表达式匹配模式（关键词需先经 normalize_keyword 归一化）"""
     patterns = {}
     
-    # 课程类匹配（技术栈+课程类型）
-    patterns["course"] = build_keyword_regex(KEYWORD_ROOTS["course"])
-    
     # 费用类匹配（支付方式+金融方案）
     cost_terms = [
         r"(分期\d{0,3}期?)",  # 匹配分期相关数字组合
     ]
-    patterns["cost"] = build_keyword_regex(KEYWORD_ROOTS["cost"],
-                                           special_regex=cost_terms)
-    
-    # 地域类智能匹配（城市+后缀组合）
-    geo_terms = [
-        r"({city})[市]?{suffix}".format(city=city, suffix=suffix)
-        for city in KEYWORD_ROOTS["geo"]["cities"]
-        for suffix in KEYWORD_ROOTS["geo"]["suffix"]
-    ]
-    patterns["geo"] = build_keyword_regex(special_regex=geo_terms)
     
-    # 竞品对比匹配（品牌词+对比词）
-    comp_terms = [
-        r"(?i)({brand})".format(brand="|".join(KEYWORD_ROOTS["competitor"]["brands"])),
-        r"(?i)({comp})".format(comp="|".join(KEYWORD_ROOTS["competitor"]["comparison"]))
-    ]
-    patterns["competitor"] = build_keyword_regex(KEYWORD_ROOTS["competitor"])
+    # 地域类智能匹配（城市 + 可选的 市/区/县 + 后缀），按结构匹配，不再展开成 城市×后缀 的正则
+    patterns["geo"] = GeoMatcher(
+        KEYWORD_ROOTS["geo"]["cities"], KEYWORD_ROOTS["geo"]["suffix"],
+        flags=0, normalize=normalize_keyword,
+    )
     
     # 资质类匹配（教育背景+经验要求）
     qual_terms = [
@@ -150,101 +144,77 @@ def build_regex_patterns():
         r"(零基础|无经验)",
         r"年龄[^\d]{0,2}(\d{2})?岁?"
     ]
-    patterns["qualification"] = build_keyword_regex(KEYWORD_ROOTS["qualification"],
-                                                    special_regex=qual_terms)
 
-    # 否定词匹配（全匹配模式）
-    patterns["negative"] = build_keyword_regex(KEYWORD_ROOTS["negative"])
-    
-    # 强化年龄检测（支持数字和中文写法）
-    # age_pattern = r"(?i)(?:年龄|岁|年纪)[^\d]{0,3}(?P<age>\d{1,2})岁?"
-    # patterns["age_check"] = re.compile(age_pattern)
-    # 强化年龄检测（支持数字和中文写法，包含"多"字处理）
-    age_pattern = r"""(?xi)
-    ^  # 确保修饰符生效
-    (?:
-        # 情况1: 关键词在前
-        (?:年[龄纪]|岁)
-        [\s：:]* 
-        (?:约|大概)? 
-        (
-            (?P<num1>\d{1,2})
-            | 
-            (?P<cn1>[零一二两三四五六七八九十廿卅]+)
-        )
-        |
-        # 情况2: 数值在前
-        (
-            (?P<num2>\d{1,2})
-            | 
-            (?P<cn2>[零一二两三四五六七八九十廿卅]+)
-        )
-        [\s：:]* 
-        (?:约|大概)? 
-        (?:个?[周岁]|岁)
+    # 年龄检测（数字和中文写法，含"多""余""左右"）见 keyword_engine.age.scan_age，
+    # 只在关键词开头匹配，与原来带 ^ 的 age_check 正则一致
+
+    # 词根类别共用一个自动机，关键词只扫描一遍即可拿到所有类别的命中
+    # （geo 是城市×后缀的组合正则，仍单独匹配）；词根与关键词同样归一化，按区分大小写匹配
+    root_categories = ["negative", "competitor", "course", "cost", "qualification"]
+    patterns["roots"] = KeywordMatcher(
+        {
+            **{
+                category: [t for terms in KEYWORD_ROOTS[category].values() for t in terms]
+                for category in root_categories
+            },
+            "weak_intent": WEAK_INTENT_TERMS,
+        },
+        special_regex={"cost": cost_terms, "qualification": qual_terms},
+        flags=0,
+        normalize=normalize_keyword,
     )
-    (?:多|余|左右)?  # 模糊词统一放在最后
-    """
+    for category in root_categories:
+        patterns[category] = patterns["roots"].category(category)
 
-    patterns["age_check"] = re.compile(age_pattern)
-    
     return patterns
-def parse_age(match):
-    num1 = match.group('num1')
-    cn1 = match.group('cn1')
-    num2 = match.group('num2')
-    cn2 = match.group('cn2')
-    
-    age = None
-    if num1:
-        age = int(num1)
-    elif num2:
-        age = int(num2)
-    elif cn1:
-        age = cn2an(cn1, mode="smart")
-    elif cn2:
-        age = cn2an(cn2, mode= "smart")
-    else:
-        raise ValueError("Failed to parse age")
-    
-    
-    # # 处理模糊词
-    # if match.group(0).endswith(('多', '余', '左右')):
-    #     return f"{age}+"
-    return age
 def classify_keyword(keyword, patterns):
     """多维度分类关键词"""
     classifications = []
+    keyword = normalize_keyword(keyword)
+    # 一次扫描拿到所有词根类别的命中
+    hits = patterns["roots"].scan(keyword)
+
     # 优先检测否定词
-    if patterns["negative"].search(keyword):
+    if "negative" in hits:
         return ["negative"]
     
     # 年龄合规检查
-    age_match = patterns["age_check"].search(keyword)
+    age_match = scan_age(keyword, anchored=True)
     if age_match:
-        print(f"Age match: {age_match.group(0)}")
-        age = parse_age(age_match)
+        age = age_match.value
         if age > KEYWORD_ROOTS["age_limit"]:
             return ["age_limit"]
 
 
     # 检测竞品类优先（避免误判）
-    if patterns["competitor"].search(keyword):
+    if "competitor" in hits:
         classifications.append("competitor")
         return classifications  # 竞品类单独处理
     
     # 多维检测
     for category in ["geo", "course", "cost", "qualification"]:
-        if patterns[category].search(keyword):
+        if category == "geo":
+            matched = patterns["geo"].search(keyword)
+        else:
+            matched = category in hits
+        if matched:
             classifications.append(category)
     
     # 弱意向逻辑处理
     if not classifications:
-        if any(q in keyword for q in ["好吗", "难吗", "前景"]):
+        if "weak_intent" in hits:
             classifications.append("qualification")
     
     return classifications if classifications else ["other"]
 
+def build_cached_classifier(patterns=None, cache=None):
+    """带持久缓存的 classify_keyword，词根、规则代码或 keyword_engine 引擎改动后缓存自动失效"""
+    if patterns is None:
+        patterns = load_or_compile(build_regex_patterns)
+    ruleset = ruleset_hash(KEYWORD_ROOTS, WEAK_INTENT_TERMS, code_fingerprint(classify_keyword), engine_fingerprint())
+    return CachedClassifier(lambda keyword: classify_keyword(keyword, patterns), ruleset, cache,
+                            normalize=normalize_keyword)
+
 # 测试用例
 test_keywords = [
     "北京Java培训班学费分期",
@@ -256,9 +226,11 @@ test_keywords = [
     "三十五岁学软件会不会太晚了"
 ]
 
-# 执行分类
-patterns = build_regex_patterns()
-for kw in test_keywords:
-    print(f"关键词：{kw}")
-    print(f"分类结果：{classify_keyword(kw, patterns)}")
-    print("-"*50)
+if __name__ == "__main__":
+    # 执行分类
+    # 规则产物按源码哈希缓存，源码不变时直接加载
+    patterns = load_or_compile(build_regex_patterns)
+    for kw in test_keywords:
+        print(f"关键词：{kw}")
+        print(f"分类结果：{classify_keyword(kw, patterns)}")
+        print("-"*50)
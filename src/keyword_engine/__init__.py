@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+关键词分类引擎公共组件
+
+导入本包不做任何工作：下面的公共名称在第一次访问时才导入所在子模块，
+pandas / openpyxl / cn2an 等重依赖只在用到对应功能时加载。
+
+    import keyword_engine
+    keyword_engine.classify("北京Java培训班学费")      # 首次调用时才构建（或加载）规则
+"""
+import importlib
+
+# 公共名称 -> 所在子模块
+_EXPORTS = {
+    "classify": "keyword_engine.engines",
+    "get_engine": "keyword_engine.engines",
+    "get_cached_engine": "keyword_engine.engines",
+    "normalize_keyword": "keyword_engine.normalize",
+    "scan_age": "keyword_engine.age",
+    "AhoCorasick": "keyword_engine.automaton",
+    "KeywordMatcher": "keyword_engine.automaton",
+    "GeoMatcher": "keyword_engine.geo",
+    "HierarchyLabeler": "keyword_engine.hierarchy",
+    "KeywordClassifier": "keyword_engine.rules",
+    "ClassifierPool": "keyword_engine.parallel",
+    "load_or_compile": "keyword_engine.artifact",
+    "ClassificationCache": "keyword_engine.cache",
+    "ChangeManifest": "keyword_engine.manifest",
+    "IncrementalIndex": "keyword_engine.incremental",
+    "RuleStats": "keyword_engine.profiling",
+    "open_sink": "keyword_engine.sinks",
+    "export_xlsx": "keyword_engine.sinks",
+    "AccountBuilder": "keyword_engine.account",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    # 缓存到包命名空间，之后的访问不再经过这里
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
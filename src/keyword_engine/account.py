@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+"""
+按分类结果生成账户结构上传文件
+
+账户结构/模板.xlsx 是上传格式：关键词分类（关键词 / 计划 / 单元）、URL设置（每个单元一行）和创意。
+AccountBuilder 把分类路径（c2 的分组、KeywordClassifier 的路径、软件开发的两列标签……）
+映射成 计划 / 单元，一遍流式写出三个工作表（只写模式）：
+- 单元关键词数、计划关键词数到上限时自动续开"单元_2"、"计划_2"……；
+- 单个文件的关键词行数到上限时续写到"账户结构_2.xlsx"……，每个文件的 URL设置、创意
+  只列出本文件里出现的单元，各文件可以单独上传；
+- 表头、列宽、表格样式取自模板，模板缺失时用内置的列。
+
+    mapper = PRESETS["c2"]        # 高成交-品牌词 -> (高意向, 品牌词)
+    with AccountBuilder("./result/账户结构.xlsx", mapper) as builder:
+        builder.add_many(zip(keywords, groups))
+    builder.files  -> [AccountFile(path='./result/账户结构.xlsx', keywords=5878, plans=3, units=6)]
+
+在仓库根目录执行：
+    PYTHONPATH=src python -m keyword_engine.account build ./result/品牌词_分组结果.csv --preset c2
+    PYTHONPATH=src python -m keyword_engine.account build ./keyword/品牌词.xlsx --engine c2 --preset c2
+    PYTHONPATH=src python -m keyword_engine.account build ./result/软件开发.csv --path-column 成交意向,词性分类
+"""
+import os
+import warnings
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from keyword_engine.excel_io import EXCEL_MAX_ROWS
+
+DEFAULT_TEMPLATE = "./账户结构/模板.xlsx"
+DEFAULT_OUTPUT = "./result/账户结构.xlsx"
+KEYWORD_SHEET = "关键词分类"
+URL_SHEET = "URL设置"
+CREATIVE_SHEET = "创意"
+# 模板缺失时各工作表的列
+KEYWORD_COLUMNS = ("关键词", "计划", "单元")
+URL_COLUMNS = ("计划名称", "单元名称", "PcUrl", "MoUrl", "Pc追踪代码", "Mo追踪代码", "启动", "标签", "小程序URL")
+CREATIVE_COLUMNS = ("计划名称", "单元名称", "创意标题", "创意描述1", "创意描述2")
+# 单元、计划的关键词数上限（按投放后台的限制调整）
+MAX_UNIT_KEYWORDS = 5000
+MAX_PLAN_KEYWORDS = 100000
+DEFAULT_PLAN = "其他"
+
+
+class PathMapper:
+    """
+    分类路径 -> (计划, 单元)
+
+    参数：
+    sep        - 路径分隔符
+    plan_depth - 前几级作为计划名，其余各级作为单元名（只有计划级时单元名同计划名）
+    rename     - 计划名改写，如 {"高成交": "高意向"}
+    overrides  - 整条路径直接指定 (计划, 单元)，优先于上面的拆分
+    skip       - 不进账户的计划（按改写前的名字），如 KeywordClassifier 的"否定词"
+
+    分类结果为元组时（如软件开发的 (成交意向, 词性分类)）按各级路径拼接；
+    为列表时（多标签）取第一个标签；空结果归入 DEFAULT_PLAN。
+    """
+
+    def __init__(
+        self,
+        sep: str = "-",
+        plan_depth: int = 1,
+        rename: Optional[Mapping[str, str]] = None,
+        overrides: Optional[Mapping[str, Tuple[str, str]]] = None,
+        skip: Iterable[str] = ()
+    ):
+        self.sep = sep
+        self.plan_depth = plan_depth
+        self.rename = dict(rename or {})
+        self.overrides = dict(overrides or {})
+        self.skip = frozenset(skip)
+
+    def path_of(self, result) -> str:
+        if isinstance(result, tuple):
+            return self.sep.join(str(part) for part in result)
+        if isinstance(result, list):
+            return str(result[0]) if result else ""
+        return "" if result is None else str(result)
+
+    def __call__(self, result) -> Optional[Tuple[str, str]]:
+        """返回 (计划, 单元)；属于 skip 的返回 None"""
+        path = self.path_of(result) or DEFAULT_PLAN
+        override = self.overrides.get(path)
+        if override is not None:
+            return override
+        parts = path.split(self.sep)
+        plan = self.sep.join(parts[:self.plan_depth])
+        if plan in self.skip:
+            return None
+        unit = self.sep.join(parts[self.plan_depth:]) or plan
+        return self.rename.get(plan, plan), unit
+
+
+# 常用映射：c2 与模板中人工整理的计划/单元一致
+PRESETS: Dict[str, PathMapper] = {
+    "default": PathMapper(),
+    "c2": PathMapper(
+        rename={"高成交": "高意向", "中成交": "中意向", "低成交": "潜在意向"},
+        overrides={"无效词": ("潜在意向", "其他类")},
+    ),
+    "keyword_classifier": PathMapper(skip=("否定词",)),
+}
+
+
+class SheetLayout(NamedTuple):
+    """
+    一个工作表的版式
+
+    header_rows - 数据之前的各行（最后一行是列名）
+    widths      - {列字母: 列宽}
+    table       - 模板中表格的 (名称, 样式)，没有表格时为 None
+    """
+    title: str
+    header_rows: Tuple[tuple, ...]
+    widths: Dict[str, float]
+    table: Optional[Tuple[str, str]] = None
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return tuple(self.header_rows[-1]) if self.header_rows else ()
+
+
+def default_layouts() -> Dict[str, SheetLayout]:
+    return {
+        KEYWORD_SHEET: SheetLayout(KEYWORD_SHEET, (KEYWORD_COLUMNS,), {}),
+        URL_SHEET: SheetLayout(URL_SHEET, (URL_COLUMNS,), {}),
+        CREATIVE_SHEET: SheetLayout(CREATIVE_SHEET, (), {}),
+    }
+
+
+def load_template(path: str = DEFAULT_TEMPLATE) -> Dict[str, SheetLayout]:
+    """
+    读取模板中三个工作表的版式
+
+    表头取到含有该表关键列（关键词 / 计划名称 / 创意标题）的那一行为止，
+    模板中没有的工作表、找不到关键列的工作表用内置的列。
+    """
+    from openpyxl import load_workbook
+
+    anchors = {KEYWORD_SHEET: KEYWORD_COLUMNS[0], URL_SHEET: URL_COLUMNS[0], CREATIVE_SHEET: CREATIVE_COLUMNS[2]}
+    layouts = default_layouts()
+    wb = load_workbook(path)
+    try:
+        for title, anchor in anchors.items():
+            if title not in wb.sheetnames:
+                continue
+            ws = wb[title]
+            header_rows = []
+            for row in ws.iter_rows(values_only=True):
+                header_rows.append(tuple("" if v is None else v for v in row))
+                if anchor in row:
+                    break
+            else:
+                header_rows = list(layouts[title].header_rows)
+            widths = {key: dim.width for key, dim in ws.column_dimensions.items() if dim.width}
+            table = next(iter(ws.tables.values()), None)
+            layouts[title] = SheetLayout(
+                title, tuple(header_rows), widths,
+                (table.displayName, table.tableStyleInfo.name if table.tableStyleInfo else None) if table else None
+            )
+    finally:
+        wb.close()
+    return layouts
+
+
+class _SheetWriter:
+    """只写模式工作表：写表头、按列名追加行，保存前补上表格范围"""
+
+    def __init__(self, wb, layout: SheetLayout, columns: Sequence[str] = ()):
+        from openpyxl.utils import get_column_letter
+
+        self.ws = wb.create_sheet(layout.title)
+        self.header_rows = layout.header_rows or ((tuple(columns),) if columns else ())
+        self.index = {name: i for i, name in enumerate(self.header_rows[-1])} if self.header_rows else {}
+        self.width = len(self.index)
+        self.rows = 0
+        for key, width in layout.widths.items():
+            self.ws.column_dimensions[key].width = width
+        self.table = None
+        if layout.table and self.header_rows:
+            from openpyxl.worksheet.table import Table, TableColumn, TableStyleInfo
+
+            name, style = layout.table
+            self.table = Table(displayName=name, ref="A1:A1")
+            if style:
+                self.table.tableStyleInfo = TableStyleInfo(name=style, showRowStripes=True)
+            # 只写模式不会从单元格读表头，表格列名要手动给出
+            self.table.tableColumns = [
+                TableColumn(id=i + 1, name=str(heading or f"列{i + 1}")) for i, heading in enumerate(self.header_rows[0])
+            ]
+            self.last_column = get_column_letter(len(self.header_rows[0]))
+            with warnings.catch_warnings():
+                # 只写模式下 add_table 总会提示手动添加表格列，上面已经给出
+                warnings.simplefilter("ignore", UserWarning)
+                self.ws.add_table(self.table)
+        for row in self.header_rows:
+            self.ws.append(list(row))
+
+    def append(self, values: Mapping[str, object]) -> None:
+        row = [None] * self.width
+        for name, value in values.items():
+            i = self.index.get(name)
+            if i is not None:
+                row[i] = value
+        self.ws.append(row)
+        self.rows += 1
+
+    def finish(self) -> None:
+        if self.table is not None:
+            # 表格至少要有一行数据
+            last_row = len(self.header_rows) + max(self.rows, 1)
+            self.table.ref = f"A1:{self.last_column}{last_row}"
+
+
+class AccountFile(NamedTuple):
+    path: str
+    keywords: int
+    plans: int
+    units: int
+
+
+class AccountBuilder:
+    """
+    流式生成账户结构文件
+
+    参数：
+    output            - 第一个文件的路径，续写的文件为"名称_2.xlsx"、"名称_3.xlsx"……
+    mapper            - 分类结果 -> (计划, 单元)，返回 None 的关键词不写入
+    template          - 模板路径（None 或文件不存在时用内置的列）
+    max_unit_keywords - 单元关键词数上限
+    max_plan_keywords - 计划关键词数上限
+    max_file_keywords - 单个文件的关键词行数上限（默认 Excel 工作表的行数上限）
+    url_defaults      - URL设置 各列的默认值，如 {"PcUrl": "https://...", "启动": "启用"}
+    unit_urls         - 按单元名（续开前的名字）覆盖 URL设置 的值
+    creatives         - 按单元名（续开前的名字）给出创意，每条为 创意标题、描述…… 的列表或 {列名: 值}
+
+    续开的单元、计划沿用原来的 URL 和创意。
+    """
+
+    def __init__(
+        self,
+        output: str = DEFAULT_OUTPUT,
+        mapper: Optional[PathMapper] = None,
+        template: Optional[str] = DEFAULT_TEMPLATE,
+        max_unit_keywords: int = MAX_UNIT_KEYWORDS,
+        max_plan_keywords: int = MAX_PLAN_KEYWORDS,
+        max_file_keywords: Optional[int] = None,
+        url_defaults: Optional[Mapping[str, object]] = None,
+        unit_urls: Optional[Mapping[str, Mapping[str, object]]] = None,
+        creatives: Optional[Mapping[str, Iterable]] = None
+    ):
+        self.output = output
+        self.mapper = mapper or PathMapper()
+        self.layouts = load_template(template) if template and os.path.exists(template) else default_layouts()
+        self.max_unit_keywords = max_unit_keywords
+        self.max_plan_keywords = max_plan_keywords
+        keyword_header = len(self.layouts[KEYWORD_SHEET].header_rows)
+        self.max_file_keywords = min(max_file_keywords or EXCEL_MAX_ROWS, EXCEL_MAX_ROWS - keyword_header)
+        self.url_defaults = dict(url_defaults or {})
+        self.unit_urls = unit_urls or {}
+        self.creatives = creatives or {}
+        self.files: List[AccountFile] = []
+        self.skipped = 0
+        # 计划名 -> [当前计划名, 关键词数, 序号]
+        self._plans: Dict[str, list] = {}
+        # (计划名, 单元名) -> [所在计划, 当前单元名, 关键词数, 序号]
+        self._units: Dict[Tuple[str, str], list] = {}
+        self._wb = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._wb = None
+
+    def _open_file(self) -> None:
+        from openpyxl import Workbook
+
+        part = len(self.files) + 1
+        stem, ext = os.path.splitext(self.output)
+        self._path = self.output if part == 1 else f"{stem}_{part}{ext}"
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._wb = Workbook(write_only=True)
+        self._keywords = _SheetWriter(self._wb, self.layouts[KEYWORD_SHEET])
+        self._urls = _SheetWriter(self._wb, self.layouts[URL_SHEET])
+        self._creatives = _SheetWriter(
+            self._wb, self.layouts[CREATIVE_SHEET], CREATIVE_COLUMNS if self.creatives else ()
+        )
+        # 本文件里已出现的 (计划, 单元)
+        self._file_units = set()
+        self._file_plans = set()
+
+    def _close_file(self) -> None:
+        for sheet in (self._keywords, self._urls, self._creatives):
+            sheet.finish()
+        self._wb.save(self._path)
+        self.files.append(AccountFile(self._path, self._keywords.rows, len(self._file_plans), len(self._file_units)))
+        self._wb = None
+
+    def _place(self, plan_base: str, unit_base: str) -> Tuple[str, str]:
+        """按上限为关键词选出 (计划, 单元)，必要时续开"""
+        plan = self._plans.get(plan_base)
+        if plan is None:
+            plan = self._plans[plan_base] = [plan_base, 0, 1]
+        elif plan[1] >= self.max_plan_keywords:
+            plan[2] += 1
+            plan[0], plan[1] = f"{plan_base}_{plan[2]}", 0
+        unit = self._units.get((plan_base, unit_base))
+        if unit is None or unit[0] != plan[0]:
+            # 新单元，或计划已续开：在当前计划里从头开始
+            unit = self._units[(plan_base, unit_base)] = [plan[0], unit_base, 0, 1]
+        elif unit[2] >= self.max_unit_keywords:
+            unit[3] += 1
+            unit[1], unit[2] = f"{unit_base}_{unit[3]}", 0
+        plan[1] += 1
+        unit[2] += 1
+        return plan[0], unit[1]
+
+    def add(self, keyword: str, result) -> bool:
+        """加入一个关键词及其分类结果，返回是否写入"""
+        mapped = self.mapper(result)
+        if mapped is None:
+            self.skipped += 1
+            return False
+        if self._wb is None:
+            self._open_file()
+        elif self._keywords.rows >= self.max_file_keywords:
+            self._close_file()
+            self._open_file()
+        plan_base, unit_base = mapped
+        plan, unit = self._place(plan_base, unit_base)
+        self._keywords.append({KEYWORD_COLUMNS[0]: keyword, KEYWORD_COLUMNS[1]: plan, KEYWORD_COLUMNS[2]: unit})
+        if (plan, unit) not in self._file_units:
+            self._file_units.add((plan, unit))
+            self._file_plans.add(plan)
+            self._add_unit(plan, unit, unit_base)
+        return True
+
+    def add_many(self, pairs: Iterable[Tuple[str, object]]) -> int:
+        """加入 (关键词, 分类结果) 序列，返回写入的关键词数"""
+        count = 0
+        for keyword, result in pairs:
+            count += self.add(keyword, result)
+        return count
+
+    def _add_unit(self, plan: str, unit: str, unit_base: str) -> None:
+        urls = {**self.url_defaults, **self.unit_urls.get(unit_base, {})}
+        self._urls.append({**urls, URL_COLUMNS[0]: plan, URL_COLUMNS[1]: unit})
+        for creative in self.creatives.get(unit_base, ()):
+            if not isinstance(creative, Mapping):
+                creative = dict(zip(CREATIVE_COLUMNS[2:], creative))
+            self._creatives.append({**creative, CREATIVE_COLUMNS[0]: plan, CREATIVE_COLUMNS[1]: unit})
+
+    def close(self) -> List[AccountFile]:
+        """写完最后一个文件，返回全部文件的汇总（没有关键词时也写出一个只有表头的文件）"""
+        if self._wb is None and not self.files:
+            self._open_file()
+        if self._wb is not None:
+            self._close_file()
+        return self.files
+
+
+def _iter_results(source: str, keyword_column: str, path_columns: Optional[List[str]], engine: Optional[str],
+                  batch_size: int, cached: bool = True) -> Iterable[Tuple[str, object]]:
+    """CLI 的输入：结果文件中的 (关键词, 分类路径)，或用引擎现场分类关键词工作簿"""
+    if engine:
+        from keyword_engine.dedup import classify_unique
+        from keyword_engine.engines import get_cached_engine, get_engine
+        from keyword_engine.excel_io import iter_keyword_batches
+        from keyword_engine.normalize import normalize_keyword
+
+        if cached:
+            classify_many = get_cached_engine(engine).classify_many
+        else:
+            classify = get_engine(engine)
+
+            def classify_many(keywords):
+                return classify_unique(keywords, lambda uniques: [classify(kw) for kw in uniques],
+                                       normalize=normalize_keyword)
+        for keywords in iter_keyword_batches(source, keyword_column, batch_size):
+            yield from zip(keywords, classify_many(keywords))
+        return
+
+    from keyword_engine.sinks import iter_frames
+
+    for frame in iter_frames(source, batch_size):
+        columns = path_columns or [frame.columns[-1]]
+        paths = zip(*(frame[c] for c in columns)) if len(columns) > 1 else frame[columns[0]]
+        yield from zip(frame[keyword_column], paths)
+
+
+def main(argv=None) -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(prog="python -m keyword_engine.account", description="生成账户结构上传文件")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="由分类结果生成 关键词分类 / URL设置 / 创意")
+    build.add_argument("source", help="结果文件（CSV / JSONL / Parquet），或配合 --engine 的关键词工作簿")
+    build.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="输出路径，超出行数上限时续写 _2、_3……")
+    build.add_argument("--engine", help="直接用该引擎分类关键词工作簿（见 keyword_engine.engines）")
+    build.add_argument("--keyword-column", default="关键词", help="关键词列")
+    build.add_argument("--path-column", help="分类路径列（默认最后一列），多列用逗号分隔，按 --sep 拼接")
+    build.add_argument("--preset", choices=list(PRESETS), default="default", help="路径 -> 计划/单元 的映射")
+    build.add_argument("--sep", help="路径分隔符（默认按 --preset）")
+    build.add_argument("--skip", action="append", default=[], help="不进账户的计划，可重复")
+    build.add_argument("--template", default=DEFAULT_TEMPLATE, help="模板路径")
+    build.add_argument("--max-unit-keywords", type=int, default=MAX_UNIT_KEYWORDS, help="单元关键词数上限")
+    build.add_argument("--max-plan-keywords", type=int, default=MAX_PLAN_KEYWORDS, help="计划关键词数上限")
+    build.add_argument("--max-file-keywords", type=int, help="单个文件的关键词数上限")
+    build.add_argument("--url", action="append", default=[], metavar="列=值", help="URL设置 的默认值，可重复")
+    build.add_argument("--unit-urls", help="JSON 文件：{单元: {列: 值}}")
+    build.add_argument("--creatives", help="JSON 文件：{单元: [[创意标题, 创意描述1, 创意描述2], ...]}")
+    build.add_argument("--batch-size", type=int, default=10000, help="每批读取的行数")
+    build.add_argument("--no-cache", action="store_true", help="配合 --engine：不查、不写分类结果缓存")
+    args = parser.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    mapper = PathMapper(
+        args.sep or preset.sep, preset.plan_depth, preset.rename, preset.overrides, preset.skip | set(args.skip)
+    )
+    url_defaults = {}
+    for item in args.url:
+        name, sep, value = item.partition("=")
+        if not sep:
+            parser.error(f"--url 应为 列=值：{item}")
+        url_defaults[name] = value
+
+    def load_json(path):
+        if not path:
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    builder = AccountBuilder(
+        args.output, mapper, args.template,
+        max_unit_keywords=args.max_unit_keywords,
+        max_plan_keywords=args.max_plan_keywords,
+        max_file_keywords=args.max_file_keywords,
+        url_defaults=url_defaults,
+        unit_urls=load_json(args.unit_urls),
+        creatives=load_json(args.creatives),
+    )
+    path_columns = args.path_column.split(",") if args.path_column else None
+    with builder:
+        builder.add_many(_iter_results(args.source, args.keyword_column, path_columns, args.engine, args.batch_size,
+                                       not args.no_cache))
+    print("file\tkeywords\tplans\tunits")
+    for account_file in builder.files:
+        print("\t".join(str(v) for v in account_file))
+    if builder.skipped:
+        print(f"跳过 {builder.skipped} 个关键词")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
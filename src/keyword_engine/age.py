@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+年龄表达式扫描
+
+识别"35岁"、"三十五周岁"、"年龄：约25左右"、"二十岁"这类写法，语义与原来的 age_check 正则一致：
+- 年龄/年纪/岁 在前：[分隔符][约|大概] 数字(1~2位) 或 中文数字
+- 数字在前：数字(恰好1~2位) 或 中文数字 [分隔符][约|大概] 个周 / 个岁 / 周 / 岁
+- 末尾可带 多 / 余 / 左右
+
+不走正则回溯：不含"岁""周""年"的关键词直接排除；其余由 年龄/年纪/岁/周 这几个锚点
+定出少量候选起点，再从左到右按固定步骤确认。
+中文数字用预先算好的 0~99 查表，只有查不到的写法才按需导入 cn2an 转换。
+"""
+import re
+from typing import NamedTuple, Optional
+
+CN_NUMERAL_CHARS = "零一二两三四五六七八九十廿卅"
+_CN_DIGITS = {"零": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_SEPARATORS = "：:"
+# 年龄表达式的锚点：前缀 年龄/年纪/岁，或数字后的 周/岁
+_ANCHOR = re.compile("年龄|年纪|[岁周]")
+
+
+def _build_cn_table() -> dict:
+    """常见中文数字写法 -> 数值（0~99，含"两""一十"等写法）"""
+    table = {}
+    for ch, value in _CN_DIGITS.items():
+        table[ch] = value
+    for ones_ch, ones in _CN_DIGITS.items():
+        if ones_ch in "零两":
+            continue
+        table["十" + ones_ch] = 10 + ones
+        table["一十" + ones_ch] = 10 + ones
+    table["十"] = table["一十"] = 10
+    for tens_ch, tens in _CN_DIGITS.items():
+        if tens < 2 or tens_ch == "两":
+            continue
+        table[tens_ch + "十"] = tens * 10
+        for ones_ch, ones in _CN_DIGITS.items():
+            if ones and ones_ch != "两":
+                table[tens_ch + "十" + ones_ch] = tens * 10 + ones
+    return table
+
+
+CN_NUMERAL_TABLE = _build_cn_table()
+
+
+def cn_to_int(text: str):
+    """中文数字转数值：常见写法查表，其余（廿五、一二三等）交给 cn2an 的 smart 模式"""
+    value = CN_NUMERAL_TABLE.get(text)
+    if value is None:
+        # cn2an 导入较慢，只在遇到少见写法时才导入
+        from cn2an import cn2an
+        value = cn2an(text, mode="smart")
+    return value
+
+
+class AgeMatch(NamedTuple):
+    """年龄匹配结果：匹配到的原文、数字部分、起止位置；数值在取 value 时才转换"""
+    text: str
+    numeral: str
+    start: int
+    end: int
+
+    @property
+    def value(self):
+        return int(self.numeral) if self.numeral.isdecimal() else cn_to_int(self.numeral)
+
+
+def _match_at(text: str, start: int) -> Optional[AgeMatch]:
+    # 热路径，分隔符、约/大概、数字等步骤直接内联，少几次函数调用
+    n = len(text)
+    head = text[start:start + 2]
+    if head in ("年龄", "年纪") or head[:1] == "岁":
+        # 年龄/年纪/岁 在前：[分隔符][约|大概] 数字
+        pos = start + (1 if head[:1] == "岁" else 2)
+        while pos < n and (text[pos] in _SEPARATORS or text[pos].isspace()):
+            pos += 1
+        if text.startswith("约", pos):
+            pos += 1
+        elif text.startswith("大概", pos):
+            pos += 2
+        num_start = end = pos
+        if end < n and text[end].isdecimal():
+            end += 1
+            if end < n and text[end].isdecimal():
+                end += 1
+        else:
+            while end < n and text[end] in CN_NUMERAL_CHARS:
+                end += 1
+        if end == num_start:
+            return None
+        num_end = end
+    else:
+        # 数字在前：数字(恰好1~2位) [分隔符][约|大概] 个周/个岁/周/岁
+        num_start = pos = start
+        if pos < n and text[pos].isdecimal():
+            pos += 1
+            if pos < n and text[pos].isdecimal():
+                pos += 1
+                if pos < n and text[pos].isdecimal():
+                    return None
+        else:
+            while pos < n and text[pos] in CN_NUMERAL_CHARS:
+                pos += 1
+        if pos == start:
+            return None
+        num_end = pos
+        while pos < n and (text[pos] in _SEPARATORS or text[pos].isspace()):
+            pos += 1
+        if text.startswith("约", pos):
+            pos += 1
+        elif text.startswith("大概", pos):
+            pos += 2
+        if pos >= n:
+            return None
+        ch = text[pos]
+        if ch in "周岁":
+            end = pos + 1
+        elif ch == "个" and pos + 1 < n and text[pos + 1] in "周岁":
+            end = pos + 2
+        else:
+            return None
+    # 末尾的 多 / 余 / 左右
+    if end < n:
+        ch = text[end]
+        if ch in "多余":
+            end += 1
+        elif ch == "左" and text.startswith("左右", end):
+            end += 2
+    return AgeMatch(text[start:end], text[num_start:num_end], start, end)
+
+
+def _numeral_start(text: str, suffix: int) -> Optional[int]:
+    """由"周/岁"的位置倒推"数字在前"写法最靠左的可能起点"""
+    i = suffix
+    if i > 0 and text[i - 1] == "个":
+        i -= 1
+    if i >= 2 and text.startswith("大概", i - 2):
+        i -= 2
+    elif i > 0 and text[i - 1] == "约":
+        i -= 1
+    while i > 0 and (text[i - 1] in _SEPARATORS or text[i - 1].isspace()):
+        i -= 1
+    end = i
+    if end > 0 and text[end - 1].isdecimal():
+        # 阿拉伯数字最多取最后两位
+        return end - 2 if end > 1 and text[end - 2].isdecimal() else end - 1
+    while i > 0 and text[i - 1] in CN_NUMERAL_CHARS:
+        i -= 1
+    return i if i < end else None
+
+
+def scan_age(text: str, anchored: bool = False) -> Optional[AgeMatch]:
+    """
+    找出关键词中最靠左的年龄表达式
+
+    参数：
+    text     - 关键词（通常已归一化）
+    anchored - 只在开头匹配（对应带 ^ 的旧正则）
+    """
+    # 任何年龄表达式都含"岁""周"或"年"，大多数关键词在这里直接排除
+    if "岁" not in text and "周" not in text and "年" not in text:
+        return None
+    if anchored:
+        return _match_at(text, 0)
+    # 候选起点：由 周/岁 倒推出的数字起点，以及 年龄/年纪/岁 本身。
+    # 数字、分隔符、约/大概/个 都不含锚点字符，后一个锚点的候选起点总在前一个锚点之后，
+    # 按锚点顺序逐个确认，第一个成立的就是最靠左的匹配
+    for anchor in _ANCHOR.finditer(text):
+        pos = anchor.start()
+        word = anchor.group()
+        if word in "周岁":
+            start = _numeral_start(text, pos)
+            if start is not None:
+                match = _match_at(text, start)
+                if match is not None:
+                    return match
+        if word != "周":
+            match = _match_at(text, pos)
+            if match is not None:
+                return match
+    return None
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+预编译规则产物
+
+把构建好的匹配器（自动机、节点表、通配符集合、生成的判定代码）整体序列化到磁盘，
+短时批处理和工作进程启动时直接加载，不再每次分词、解析、编译整套配置。
+
+产物文件 = 一行 JSON 文件头 + pickle 数据。文件头记录产物格式版本、规则集哈希、
+解释器版本和数据的 sha256，任何一项对不上都视为过期，由 load_or_compile 重新构建。
+文件名带规则集哈希，配置、构建代码或 keyword_engine 包内任何模块一改就落到新文件上。
+
+命令行（在仓库根目录执行，产物写到 ./cache/rules）：
+    PYTHONPATH=src python -m keyword_engine.artifact compile-rules 模块:构建函数 [-o 输出路径]
+"""
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Callable, Optional
+
+from keyword_engine.cache import code_fingerprint, engine_fingerprint, ruleset_hash
+
+DEFAULT_ARTIFACT_DIR = "./cache/rules"
+# 产物格式版本，序列化方式变化时递增
+ARTIFACT_VERSION = 1
+
+
+class ArtifactMismatch(ValueError):
+    """产物与当前规则集、格式版本或解释器不匹配"""
+
+
+def artifact_ruleset(build: Callable, *args) -> str:
+    """
+    构建函数（或类）的规则集哈希：由其限定名、所在模块源码、keyword_engine 包源码和参数共同决定
+
+    产物里序列化的是包内的匹配器对象（KeywordMatcher、GeoMatcher、WildcardSet……）和
+    预先归一化的词根，包内任何模块改动都要换新产物。
+    不含模块名，脚本直接运行（__main__）和被导入时得到同一个哈希
+    """
+    name = getattr(build, "__qualname__", repr(build))
+    return ruleset_hash(ARTIFACT_VERSION, name, code_fingerprint(build), engine_fingerprint(), *args)
+
+
+def artifact_path(build: Callable, *args, directory: str = DEFAULT_ARTIFACT_DIR) -> str:
+    """产物默认路径：<目录>/<构建函数名>-<规则集哈希前16位>.rules"""
+    name = getattr(build, "__name__", "rules")
+    return os.path.join(directory, f"{name}-{artifact_ruleset(build, *args)[:16]}.rules")
+
+
+def _header(ruleset: str, digest: str) -> dict:
+    return {
+        "version": ARTIFACT_VERSION,
+        "ruleset": ruleset,
+        "python": sys.implementation.cache_tag,
+        "sha256": digest,
+        "created": time.time(),
+    }
+
+
+def compile_rules(obj, path: str, ruleset: str) -> str:
+    """
+    把构建好的匹配器写成产物文件（先写临时文件再改名，并发读取不会读到半个文件）
+
+    参数：
+    obj     - 可 pickle 的匹配器对象
+    path    - 输出路径
+    ruleset - 规则集哈希，加载时用来校验
+    """
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    header = _header(ruleset, hashlib.sha256(payload).hexdigest())
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_rules(path: str, ruleset: Optional[str] = None):
+    """
+    加载产物文件
+
+    ruleset 给出时校验规则集哈希；格式版本、解释器版本或数据校验和不一致时抛出 ArtifactMismatch
+    """
+    with open(path, "rb") as f:
+        header = json.loads(f.readline())
+        payload = f.read()
+    if header.get("version") != ARTIFACT_VERSION:
+        raise ArtifactMismatch(f"artifact version {header.get('version')} != {ARTIFACT_VERSION}: {path}")
+    if header.get("python") != sys.implementation.cache_tag:
+        raise ArtifactMismatch(f"artifact built by {header.get('python')}: {path}")
+    if ruleset is not None and header.get("ruleset") != ruleset:
+        raise ArtifactMismatch(f"artifact ruleset mismatch: {path}")
+    if hashlib.sha256(payload).hexdigest() != header.get("sha256"):
+        raise ArtifactMismatch(f"artifact checksum mismatch: {path}")
+    return pickle.loads(payload)
+
+
+def load_or_compile(build: Callable, *args, directory: str = DEFAULT_ARTIFACT_DIR, force: bool = False):
+    """
+    有可用产物时直接加载，否则调用 build(*args) 构建并写出产物
+
+    参数：
+    build     - 构建函数或匹配器类，如 build_regex_patterns、KeywordClassifier
+    args      - 传给 build 的参数，需可 JSON 序列化（参与规则集哈希）
+    directory - 产物目录
+    force     - 忽略已有产物，强制重新构建
+    """
+    ruleset = artifact_ruleset(build, *args)
+    path = artifact_path(build, *args, directory=directory)
+    if not force:
+        try:
+            return load_rules(path, ruleset)
+        except FileNotFoundError:
+            pass
+        except (ArtifactMismatch, OSError, EOFError, ValueError,
+                pickle.UnpicklingError, AttributeError, ImportError) as e:
+            # 产物损坏或构建代码已变，重新构建覆盖
+            print(f"规则产物已失效，重新构建：{e}", file=sys.stderr)
+    obj = build(*args)
+    compile_rules(obj, path, ruleset)
+    return obj
+
+
+def _resolve(target: str) -> Callable:
+    module_name, _, attr = target.partition(":")
+    if not attr:
+        raise ValueError(f"target should look like module:function, got {target!r}")
+    obj = importlib.import_module(module_name)
+    for part in attr.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def main(argv=None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m keyword_engine.artifact", description="预编译规则产物")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = commands.add_parser("compile-rules", help="构建匹配器并写出产物")
+    compile_parser.add_argument("target", help="无参构建函数，形如 模块:函数")
+    compile_parser.add_argument("-o", "--output", help="输出路径（默认按规则集哈希放在产物目录下）")
+    compile_parser.add_argument("-d", "--directory", default=DEFAULT_ARTIFACT_DIR, help="产物目录")
+    args = parser.parse_args(argv)
+
+    build = _resolve(args.target)
+    start = time.perf_counter()
+    if args.output:
+        path = compile_rules(build(), args.output, artifact_ruleset(build))
+    else:
+        load_or_compile(build, directory=args.directory, force=True)
+        path = artifact_path(build, directory=args.directory)
+    print(f"{args.target} -> {path}（{time.perf_counter() - start:.2f}s）")
+
+
+if __name__ == "__main__":
+    main()
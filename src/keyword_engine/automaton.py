@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+多模式匹配自动机（Aho-Corasick）
+
+把所有类别的词根装进同一个自动机，关键词只需从左到右扫描一遍，
+就能得到每个类别命中的全部词根。扫描代价只与关键词长度有关，
+与词根数量无关。
+"""
+import re
+from collections import deque
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick 自动机
+
+    参数：
+    items       - (词, 附带数据) 序列，同一个词可以挂多份附带数据
+    ignore_case - 是否忽略大小写（默认True，建树和扫描时统一转小写）
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, Hashable]], ignore_case: bool = True):
+        self.ignore_case = ignore_case
+        # 状态0为根节点
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Hashable, ...]] = [()]
+        # 词尾状态 -> 该词自身的附带数据个数（_out 中排在失败链合并进来的输出之前）
+        self._own: Dict[int, int] = {}
+        for term, payload in items:
+            self._add(term, payload)
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def _add(self, term: str, payload: Hashable) -> None:
+        if not term:
+            return
+        if self.ignore_case:
+            term = term.lower()
+        state = 0
+        for ch in term:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        if payload not in self._out[state]:
+            self._out[state] += (payload,)
+            self._own[state] = len(self._out[state])
+
+    def _build(self) -> None:
+        """广度优先计算失败指针，并把失败链上的输出合并到当前状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = fail
+                if self._out[fail]:
+                    self._out[nxt] += tuple(p for p in self._out[fail] if p not in self._out[nxt])
+
+    def iter_hits(self, text: str) -> Iterator[Tuple[int, Hashable]]:
+        """逐个产出 (命中词结尾位置, 附带数据)"""
+        if self.ignore_case:
+            text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for payload in out[state]:
+                    yield pos, payload
+
+    def iter_prefixes(self, text: str, pos: int = 0) -> Iterator[Tuple[int, Hashable]]:
+        """逐个产出恰好从 pos 开始的命中词 (结尾位置, 附带数据)：沿字典树往下走，不经过失败指针"""
+        if self.ignore_case:
+            text = text.lower()
+        goto, out, own = self._goto, self._out, self._own
+        state = 0
+        for end in range(pos, len(text)):
+            state = goto[state].get(text[end])
+            if state is None:
+                return
+            count = own.get(state)
+            if count:
+                for payload in out[state][:count]:
+                    yield end, payload
+
+    def payloads(self, text: str) -> Set[Hashable]:
+        """返回命中的全部附带数据"""
+        return {payload for _, payload in self.iter_hits(text)}
+
+
+class KeywordMatcher:
+    """
+    一次扫描得到所有类别命中的关键词匹配器
+
+    参数：
+    keyword_roots - {类别: [词根列表]}
+    special_regex - {类别: [特殊正则列表]}，词根无法表达的规则走正则兜底
+    flags         - 正则表达式标志（默认忽略大小写）
+    normalize     - 词根归一化函数；传入时 scan() 的文本应已用同一函数归一化，
+                    通常与 flags=0 搭配使用
+
+    scan() 返回 {类别: 命中词集合}；search() 与 re.Pattern.search 一样可直接做真假判断。
+    最近一次扫描的结果会保留下来，同一关键词上的 scan() / search() / 各类别视图只扫描一遍
+    （因此返回的结果不要修改）。
+    """
+
+    def __init__(
+        self,
+        keyword_roots: Dict[str, List[str]],
+        special_regex: Optional[Dict[str, List[str]]] = None,
+        flags: re.RegexFlag = re.IGNORECASE,
+        normalize: Optional[Callable[[str], str]] = None
+    ):
+        self.categories = list(keyword_roots)
+        normalize = normalize or (lambda term: term)
+        self._automaton = AhoCorasick(
+            ((normalize(term), (category, term))
+             for category, terms in keyword_roots.items()
+             for term in terms),
+            ignore_case=bool(flags & re.IGNORECASE)
+        )
+        # 特殊正则按类别合并成一条，只在该类别没有词根命中时才执行
+        self._special = {}
+        for category, regex_list in (special_regex or {}).items():
+            regex_list = [r for r in regex_list if r]
+            if not regex_list:
+                continue
+            if category not in self.categories:
+                self.categories.append(category)
+            self._special[category] = re.compile(
+                "|".join(f"(?:{r})" for r in regex_list), flags=flags
+            )
+        # 最近一次扫描的 (文本, 结果)，整体替换，多线程下读到的总是同一次扫描
+        self._last: Tuple[Optional[str], Dict[str, Set[str]]] = (None, {})
+
+    def __getstate__(self):
+        # 序列化（规则产物、进程池）时不带上次的扫描结果
+        state = self.__dict__.copy()
+        state["_last"] = (None, {})
+        return state
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        """扫描一遍关键词，返回 {类别: 命中词集合}（未命中的类别不出现）"""
+        last_text, last_hits = self._last
+        if text == last_text:
+            return last_hits
+        hits: Dict[str, Set[str]] = {}
+        for _, (category, term) in self._automaton.iter_hits(text):
+            hits.setdefault(category, set()).add(term)
+        for category, regex in self._special.items():
+            if category in hits:
+                continue
+            match = regex.search(text)
+            if match:
+                hits[category] = {match.group(0)}
+        self._last = (text, hits)
+        return hits
+
+    def search(self, text: str) -> Optional[Dict[str, Set[str]]]:
+        """兼容 re.Pattern.search：有任何命中时返回命中结果，否则返回None"""
+        return self.scan(text) or None
+
+    def category(self, name: str) -> "CategoryView":
+        """取单个类别的视图，可替代原来的单类别正则"""
+        return CategoryView(self, name)
+
+
+class CategoryView:
+    """共享自动机上的单类别视图：同一关键词上的多个视图共用 KeywordMatcher 的一次扫描"""
+
+    def __init__(self, matcher: KeywordMatcher, name: str):
+        self.matcher = matcher
+        self.name = name
+
+    def search(self, text: str) -> Optional[Set[str]]:
+        return self.matcher.scan(text).get(self.name)
+
+
+def _flatten_terms(terms) -> List[str]:
+    """兼容 {子类: [词]} 与 [词] 两种写法"""
+    if isinstance(terms, dict):
+        return [t for sub_terms in terms.values() for t in _flatten_terms(sub_terms)]
+    return list(terms)
+
+
+def build_keyword_matcher(
+    keyword_roots: Dict[str, List[str]] = {},
+    categories: Optional[List[str]] = None,
+    special_regex: List[str] = [],
+    word_boundary: bool = False,
+    escape: bool = True,
+    flags: re.RegexFlag = re.IGNORECASE
+) -> KeywordMatcher:
+    """
+    与 build_keyword_regex 参数一致的自动机版本
+
+    参数：
+    keyword_roots - 关键词字典 {类别: [关键词列表]}（也接受 {类别: {子类: [关键词列表]}}）
+    categories    - 指定要处理的类别列表（默认全部处理）
+    special_regex - 特殊正则表达式列表，命中时记在 "special" 类别下
+    word_boundary - 是否精确匹配（默认False），开启后词根改走正则
+    escape        - 是否转义特殊字符（默认True），关闭后词根视为正则
+    flags         - 正则表达式标志（默认忽略大小写）
+
+    返回：KeywordMatcher 对象
+    """
+    selected_categories = categories or keyword_roots.keys()
+    literal_roots = {}
+    regex_roots = {}
+    for category in selected_categories:
+        terms = _flatten_terms(keyword_roots.get(category, []))
+        if not terms:
+            continue
+        if escape and not word_boundary:
+            literal_roots[category] = terms
+        else:
+            # 非纯文本词根无法放进自动机，按原来的方式拼成正则
+            processed_terms = [re.escape(term) if escape else term for term in terms]
+            if word_boundary:
+                processed_terms = [rf"\b{term}\b" for term in processed_terms]
+            regex_roots[category] = processed_terms
+    if special_regex:
+        regex_roots["special"] = list(special_regex)
+    return KeywordMatcher(literal_roots, special_regex=regex_roots, flags=flags)
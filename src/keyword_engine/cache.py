@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+分类结果持久缓存
+
+两级缓存：进程内 LRU + 磁盘 SQLite。缓存键为 (规则集哈希, 关键词)，
+规则集哈希由配置、通配符字典、分类器代码和 keyword_engine 包源码共同决定，规则一变旧结果自动失效。
+每天重跑时只有新关键词需要真正分类。各引擎的缓存版本见 keyword_engine.engines.get_cached_engine。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+DEFAULT_CACHE_PATH = "./cache/classify_cache.sqlite"
+DEFAULT_MEMORY_SIZE = 100000
+DEFAULT_MAX_ROWS = 5000000
+# 超出上限时淘汰到上限的这个比例，之后要再写入一成才会再次统计、淘汰
+EVICT_TO = 0.9
+# 缓存格式版本，结果序列化方式变化时递增
+CACHE_VERSION = 1
+# 单条 SQL 中 IN (...) 的参数个数上限
+_SQL_CHUNK = 500
+
+
+def ruleset_hash(*parts) -> str:
+    """对规则配置（dict/list/str 等可 JSON 序列化对象）计算稳定的哈希"""
+    payload = json.dumps([CACHE_VERSION, *parts], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def code_fingerprint(obj) -> str:
+    """分类器所在模块（obj 本身是模块时即该模块）的源码，用于代码改动后让缓存失效"""
+    # inspect 导入较慢，只在计算指纹时才需要
+    import inspect
+
+    if inspect.ismodule(obj):
+        module = obj
+    else:
+        module = sys.modules.get(getattr(obj, "__module__", None) or type(obj).__module__)
+    try:
+        return inspect.getsource(module)
+    except (OSError, TypeError):
+        return ""
+
+
+# keyword_engine 包源码的哈希，第一次用到时计算
+_engine_fingerprint: Optional[str] = None
+
+
+def engine_fingerprint() -> str:
+    """
+    keyword_engine 包内全部模块源码的哈希
+
+    归一化、自动机、通配符、规则编译等任何一处改动都会改变分类结果或序列化对象的结构，
+    依赖它们的缓存键、规则产物和变更清单都要带上这个指纹
+    """
+    global _engine_fingerprint
+    if _engine_fingerprint is None:
+        package = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(package)):
+            if not name.endswith(".py"):
+                continue
+            digest.update(name.encode("utf-8") + b"\0")
+            with open(os.path.join(package, name), "rb") as f:
+                digest.update(f.read())
+        _engine_fingerprint = digest.hexdigest()
+    return _engine_fingerprint
+
+
+class ClassificationCache:
+    """
+    两级分类结果缓存
+
+    参数：
+    path        - SQLite 文件路径
+    memory_size - 进程内 LRU 条数上限
+    max_rows    - 磁盘缓存条数上限，超出后按最近使用时间淘汰最旧的条目（淘汰到上限的 EVICT_TO）
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        memory_size: int = DEFAULT_MEMORY_SIZE,
+        max_rows: int = DEFAULT_MAX_ROWS
+    ):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_rows = max_rows
+        # 磁盘条数的估计（只加不减，替换已有条目也按新增计），超过上限时才真正统计
+        self._rows: Optional[int] = None
+        self._memory: "OrderedDict[tuple, object]" = OrderedDict()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 批量分类的多个工作进程共用一个缓存文件，写入时等其他进程的事务结束
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " ruleset TEXT NOT NULL, keyword TEXT NOT NULL, result TEXT NOT NULL,"
+            " used REAL NOT NULL, PRIMARY KEY (ruleset, keyword)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_used ON results (used)")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _remember(self, key: tuple, value) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, ruleset: str, keywords: Iterable[str]) -> Dict[str, object]:
+        """批量查询，返回命中的 {关键词: 结果}"""
+        found = {}
+        missing = []
+        for kw in keywords:
+            key = (ruleset, kw)
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[kw] = self._memory[key]
+            else:
+                missing.append(kw)
+
+        now = time.time()
+        touched = False
+        for i in range(0, len(missing), _SQL_CHUNK):
+            chunk = missing[i:i + _SQL_CHUNK]
+            rows = self._conn.execute(
+                f"SELECT keyword, result FROM results WHERE ruleset = ? AND keyword IN ({','.join('?' * len(chunk))})",
+                [ruleset, *chunk]
+            ).fetchall()
+            if not rows:
+                continue
+            for kw, result in rows:
+                value = json.loads(result)
+                found[kw] = value
+                self._remember((ruleset, kw), value)
+            self._conn.executemany(
+                "UPDATE results SET used = ? WHERE ruleset = ? AND keyword = ?",
+                [(now, ruleset, kw) for kw, _ in rows]
+            )
+            touched = True
+        # 只读不写时不提交，避免空事务
+        if touched:
+            self._conn.commit()
+        return found
+
+    def put_many(self, ruleset: str, results: Dict[str, object]) -> None:
+        """批量写入 {关键词: 结果}"""
+        if not results:
+            return
+        now = time.time()
+        for kw, value in results.items():
+            self._remember((ruleset, kw), value)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO results (ruleset, keyword, result, used) VALUES (?, ?, ?, ?)",
+            [(ruleset, kw, json.dumps(value, ensure_ascii=False), now) for kw, value in results.items()]
+        )
+        if self._rows is None:
+            self._rows = self._count()
+        else:
+            self._rows += len(results)
+        if self._rows > self.max_rows:
+            self._evict()
+        self._conn.commit()
+
+    def _count(self) -> int:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        return count
+
+    def _evict(self) -> None:
+        # 估计值偏大（替换、其他进程的淘汰），先统计实际条数
+        count = self._count()
+        if count > self.max_rows:
+            overflow = count - int(self.max_rows * EVICT_TO)
+            self._conn.execute(
+                "DELETE FROM results WHERE (ruleset, keyword) IN "
+                "(SELECT ruleset, keyword FROM results ORDER BY used LIMIT ?)",
+                (overflow,)
+            )
+            count -= overflow
+        self._rows = count
+
+
+class CachedClassifier:
+    """
+    给任意"关键词 -> 结果"的分类函数加上两级缓存
+
+    参数：
+    func      - 分类函数，结果需可 JSON 序列化（字符串或列表）
+    ruleset   - 规则集哈希，见 ruleset_hash
+    cache     - ClassificationCache 实例（默认打开 DEFAULT_CACHE_PATH）
+    normalize - 计算缓存键的归一化函数（默认原样使用关键词）；
+                只应合并分类结果必然相同的写法
+    batch     - 批量分类函数（关键词列表 -> 结果列表），给出时未命中的关键词整批交给它
+    decode    - 从磁盘读回的结果的还原函数：JSON 不区分元组和列表，结果为元组时传 tuple
+    """
+
+    def __init__(
+        self,
+        func: Callable[[str], object],
+        ruleset: str,
+        cache: Optional[ClassificationCache] = None,
+        normalize: Optional[Callable[[str], str]] = None,
+        batch: Optional[Callable[[List[str]], list]] = None,
+        decode: Optional[Callable[[object], object]] = None
+    ):
+        self.func = func
+        self.ruleset = ruleset
+        self.cache = cache or ClassificationCache()
+        self.normalize = normalize or (lambda text: text)
+        self.batch = batch
+        self.decode = decode
+
+    def __call__(self, keyword: str):
+        return self.classify_many([keyword])[0]
+
+    def classify_many(self, keywords: Iterable[str]) -> List[object]:
+        """批量分类：先查缓存，只对未命中的关键词调用分类函数，再批量回写"""
+        keywords = list(keywords)
+        keys = [self.normalize(kw) for kw in keywords]
+        # 同一个键只算一次，用第一次出现的原始关键词
+        first_seen = {}
+        for kw, key in zip(keywords, keys):
+            first_seen.setdefault(key, kw)
+        results = self.cache.get_many(self.ruleset, list(first_seen))
+        if self.decode is not None:
+            results = {key: self.decode(value) for key, value in results.items()}
+        misses = [(key, kw) for key, kw in first_seen.items() if key not in results]
+        if self.batch is not None:
+            computed = dict(zip((key for key, _ in misses), self.batch([kw for _, kw in misses]))) if misses else {}
+        else:
+            computed = {key: self.func(kw) for key, kw in misses}
+        self.cache.put_many(self.ruleset, computed)
+        results.update(computed)
+        return [results[key] for key in keys]
+
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+去重分类再回填
+
+关键词导出在不同产品、匹配方式之间大量重复。先把关键词归一化并编号（factorize），
+只对不同的归一化关键词分类一次，再按编号把结果回填到每一行。
+"""
+from typing import Callable, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from keyword_engine.normalize import normalize_keyword
+
+
+def factorize(keys: Iterable[Hashable]) -> Tuple[List[int], List[Hashable]]:
+    """返回 (每个元素的编号, 按首次出现顺序排列的不同取值)"""
+    index = {}
+    codes = []
+    for key in keys:
+        code = index.get(key)
+        if code is None:
+            code = index[key] = len(index)
+        codes.append(code)
+    return codes, list(index)
+
+
+def classify_unique(
+    keywords: Sequence[str],
+    classify_many: Callable[[List[str]], Sequence],
+    normalize: Optional[Callable[[str], str]] = normalize_keyword
+) -> List:
+    """
+    只对不同的归一化关键词调用 classify_many，结果按输入顺序回填
+
+    参数：
+    keywords      - 关键词序列
+    classify_many - 批量分类函数，输入归一化后的关键词列表，返回等长结果
+    normalize     - 归一化函数（None 表示原样去重）
+    """
+    keys = [normalize(kw) for kw in keywords] if normalize else list(keywords)
+    codes, uniques = factorize(keys)
+    labels = list(classify_many(uniques))
+    return [labels[code] for code in codes]
+
+
+def classify_unique_series(series, classify_many: Callable, normalize: Optional[Callable] = None, default=None):
+    """
+    pandas 版本：series 归一化后用 pd.factorize 编号，分类不同取值后按编号广播
+
+    normalize 作用于整列（如 normalize_series）；空值行填 default。
+    """
+    import numpy as np
+    import pandas as pd
+
+    keys = normalize(series) if normalize else series
+    codes, uniques = pd.factorize(keys)
+    labels = np.asarray(list(classify_many(pd.Series(uniques, dtype=object))), dtype=object)
+    result = np.full(len(series), default, dtype=object)
+    valid = codes >= 0
+    result[valid] = labels[codes[valid]]
+    return pd.Series(result, index=series.index, name=series.name)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+分类引擎入口
+
+各分类脚本（classify_keyword、c1、c2、软件开发）按名称注册成引擎。导入本模块不做任何工作：
+引擎在第一次分类时才导入对应脚本，规则按 load_or_compile 从预编译产物加载（没有产物时构建并写出），
+之后在进程内复用。编排器拉起的短时工作进程只需要：
+
+    from keyword_engine.engines import classify
+    classify("北京Java培训班学费", engine="c1")
+
+批量处理文件时用 get_cached_engine：结果按规则集存进 keyword_engine.cache，每天重跑时重复的关键词不再分类。
+
+脚本按模块名导入，src 目录需在 sys.path 上（在 src 下运行，或 PYTHONPATH=src）。
+
+启动预算：在新进程里测量 导入 + 首次分类 的耗时，超出预算时退出码为 1（在仓库根目录执行）：
+    PYTHONPATH=src python -m keyword_engine.engines budget
+    PYTHONPATH=src python -m keyword_engine.engines budget --engines c1,c2 --budget-ms 150 --cold
+"""
+import importlib
+from typing import Callable, Dict, List
+
+DEFAULT_ENGINE = "classify_keyword"
+# 导入 + 首次分类的默认预算（毫秒，产物已预编译的情况）
+STARTUP_BUDGET_MS = 100
+# 不应在单纯分类时被导入的重依赖
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "cn2an")
+
+
+def _patterns_engine(module_name: str) -> Callable[[], Callable]:
+    """build_regex_patterns + classify_keyword(keyword, patterns) 形式的脚本"""
+    def build():
+        from keyword_engine.artifact import load_or_compile
+
+        module = importlib.import_module(module_name)
+        patterns = load_or_compile(module.build_regex_patterns)
+        return lambda keyword: module.classify_keyword(keyword, patterns)
+    return build
+
+
+def _group_engine():
+    return importlib.import_module("c2").classify_keyword
+
+
+def _software_engine():
+    module = importlib.import_module("软件开发")
+    normalize = module.normalize_keyword
+    return lambda keyword: module.classify_cleaned(normalize(keyword))
+
+
+# 引擎名 -> 构建分类函数的无参函数
+_BUILDERS: Dict[str, Callable[[], Callable]] = {
+    "classify_keyword": _patterns_engine("classify_keyword"),
+    "c1": _patterns_engine("c1"),
+    "c2": _group_engine,
+    "软件开发": _software_engine,
+}
+_engines: Dict[str, Callable] = {}
+_cached_engines: Dict[str, Callable] = {}
+
+
+def engine_names() -> List[str]:
+    return list(_BUILDERS)
+
+
+def get_engine(name: str = DEFAULT_ENGINE) -> Callable:
+    """取引擎的单关键词分类函数，第一次取时才导入脚本并构建（或加载）规则"""
+    engine = _engines.get(name)
+    if engine is None:
+        build = _BUILDERS.get(name)
+        if build is None:
+            raise ValueError(f"unknown engine {name!r}, expected one of: {', '.join(_BUILDERS)}")
+        engine = _engines[name] = build()
+    return engine
+
+
+def get_cached_engine(name: str = DEFAULT_ENGINE, cache=None):
+    """
+    取引擎的带持久缓存版本（CachedClassifier），用 classify_many 批量分类
+
+    脚本提供 build_cached_classifier(cache=...) 时用它（可带批量分类函数），
+    否则逐词调用引擎，缓存按 引擎名 + 脚本源码 + keyword_engine 指纹 区分。
+    不传 cache 时打开默认缓存文件，并在进程内复用。
+    """
+    engine = _cached_engines.get(name) if cache is None else None
+    if engine is None:
+        if name not in _BUILDERS:
+            raise ValueError(f"unknown engine {name!r}, expected one of: {', '.join(_BUILDERS)}")
+        from keyword_engine.cache import CachedClassifier, code_fingerprint, engine_fingerprint, ruleset_hash
+        from keyword_engine.normalize import normalize_keyword
+
+        # 引擎名即脚本模块名
+        module = importlib.import_module(name)
+        build = getattr(module, "build_cached_classifier", None)
+        if build is not None:
+            engine = build(cache=cache)
+        else:
+            ruleset = ruleset_hash(name, code_fingerprint(module), engine_fingerprint())
+            engine = CachedClassifier(get_engine(name), ruleset, cache, normalize=normalize_keyword)
+        if cache is None:
+            _cached_engines[name] = engine
+    return engine
+
+
+def classify(keyword: str, engine: str = DEFAULT_ENGINE):
+    """用指定引擎分类单个关键词"""
+    return get_engine(engine)(keyword)
+
+
+# 在新进程里执行：导入包、取引擎、分类一个关键词，以 JSON 输出各阶段耗时和已加载的重依赖
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import keyword_engine
+engine = keyword_engine.get_engine(sys.argv[1])
+loaded = time.perf_counter()
+engine(sys.argv[2])
+done = time.perf_counter()
+print(json.dumps({
+    "load_ms": (loaded - start) * 1e3,
+    "first_ms": (done - loaded) * 1e3,
+    "total_ms": (done - start) * 1e3,
+    "heavy": [m for m in sys.argv[3].split(",") if m in sys.modules],
+}))
+"""
+
+
+def measure_startup(name: str, keyword: str = "北京Java培训班学费分期") -> dict:
+    """在新的解释器里测量 导入 + 取引擎 + 首次分类 的耗时（毫秒）"""
+    import json
+    import os
+    import subprocess
+    import sys
+
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE, name, keyword, ",".join(HEAVY_MODULES)],
+        env=env, capture_output=True, text=True, encoding="utf-8", check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    import argparse
+    import shutil
+    import statistics
+    import sys
+
+    from keyword_engine.artifact import DEFAULT_ARTIFACT_DIR
+
+    parser = argparse.ArgumentParser(prog="python -m keyword_engine.engines", description="分类引擎入口")
+    commands = parser.add_subparsers(dest="command", required=True)
+    budget = commands.add_parser("budget", help="检查 导入 + 首次分类 的耗时是否在预算内")
+    budget.add_argument("--engines", default="all", help=f"引擎，逗号分隔：{','.join(_BUILDERS)}")
+    budget.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="预算（毫秒，取中位数比较）")
+    budget.add_argument("--repeat", type=int, default=5, help="每个引擎测量次数")
+    budget.add_argument("--cold", action="store_true", help="先删掉规则产物目录，测量无产物时的首次启动")
+    args = parser.parse_args(argv)
+
+    names = engine_names() if args.engines == "all" else args.engines.split(",")
+    unknown = [name for name in names if name not in _BUILDERS]
+    if unknown:
+        parser.error(f"未知引擎：{','.join(unknown)}")
+
+    over = []
+    print("engine\tload_ms\tfirst_ms\ttotal_ms\theavy")
+    for name in names:
+        if args.cold:
+            shutil.rmtree(DEFAULT_ARTIFACT_DIR, ignore_errors=True)
+            runs = [measure_startup(name)]
+        else:
+            # 先跑一次写出规则产物，之后测的是工作进程的常规启动
+            measure_startup(name)
+            runs = [measure_startup(name) for _ in range(max(1, args.repeat))]
+        row = {key: statistics.median(run[key] for run in runs) for key in ("load_ms", "first_ms", "total_ms")}
+        heavy = sorted({m for run in runs for m in run["heavy"]})
+        print(f"{name}\t{row['load_ms']:.1f}\t{row['first_ms']:.1f}\t{row['total_ms']:.1f}\t{','.join(heavy) or '-'}")
+        if row["total_ms"] > args.budget_ms:
+            over.append(name)
+    if over:
+        print(f"超出预算 {args.budget_ms:g}ms：{','.join(over)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+流式读写关键词工作簿
+
+读取用 openpyxl 只读模式逐行迭代，按批产出关键词；
+写入用只写模式逐行落盘。整条流水线的内存占用只与批大小有关，与文件大小无关。
+openpyxl 在真正读写时才导入，只做分类的进程不加载它。
+"""
+import os
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+KEYWORD_COLUMN = "关键词"
+DEFAULT_BATCH_SIZE = 10000
+# Excel 单个工作表的行数上限（含表头）
+EXCEL_MAX_ROWS = 1048576
+# Excel 工作表名的长度上限
+SHEET_NAME_LIMIT = 31
+
+
+class KeywordRow(NamedTuple):
+    """输入工作表的一行：行号（工作表中的行号，表头为第1行）、关键词、整行的值"""
+    row: int
+    keyword: str
+    values: tuple
+
+    def pick(self, indexes: Sequence[int]) -> list:
+        """按下标取原表的值：空单元格为空字符串，其余转成字符串（各格式读回时都是字符串）"""
+        values = self.values
+        return ["" if values[i] is None else str(values[i]) for i in indexes]
+
+
+def merge_header(header: Sequence, result_columns: Sequence[str]) -> Tuple[List[str], List[int]]:
+    """
+    原表表头 + 结果列 -> (输出列名, 保留的原表列下标)
+
+    与结果列同名的原表列不再输出（由本次结果代替），空表头单元格记为"列N"
+    """
+    names = [f"列{i + 1}" if name is None else str(name) for i, name in enumerate(header)]
+    keep = [i for i, name in enumerate(names) if name not in result_columns]
+    return [names[i] for i in keep] + list(result_columns), keep
+
+
+def _open_sheet(path: str, column: str, sheet_name: Optional[str]):
+    """打开工作表，返回 (工作簿, 数据行迭代器, 表头, 关键词列下标)；空工作表时表头为 None"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return wb, rows, None, None
+        try:
+            col_idx = list(header).index(column)
+        except ValueError:
+            raise ValueError(f"{path} 中没有找到列：{column}") from None
+    except BaseException:
+        wb.close()
+        raise
+    return wb, rows, tuple(header), col_idx
+
+
+def iter_keyword_batches(
+    path: str,
+    column: str = KEYWORD_COLUMN,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    sheet_name: Optional[str] = None
+) -> Iterator[List[str]]:
+    """
+    按批读取工作簿中的关键词列
+
+    参数：
+    path       - 工作簿路径
+    column     - 关键词所在列的表头（默认"关键词"）
+    batch_size - 每批关键词数量
+    sheet_name - 工作表名（默认第一个工作表）
+
+    只产出关键词列，空单元格会被跳过：其他列不会带出，结果的序号也不等于工作表行号。
+    需要带上其他列、或按行号把结果回连到原表时用 iter_row_batches。空工作簿不产出任何批次。
+    """
+    wb, rows, header, col_idx = _open_sheet(path, column, sheet_name)
+    try:
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            value = row[col_idx] if col_idx < len(row) else None
+            if value is None:
+                continue
+            batch.append(str(value))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        wb.close()
+
+
+def iter_row_batches(
+    path: str,
+    column: str = KEYWORD_COLUMN,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    sheet_name: Optional[str] = None
+) -> Iterator[Tuple[tuple, List[KeywordRow]]]:
+    """
+    按批读取整行，产出 (表头, [KeywordRow, ...])
+
+    与 iter_keyword_batches 跳过同样的行（关键词为空），但每行带上工作表行号和全部列的值，
+    分类结果可以连同其他列一起写出，或按行号回连到原表。
+    """
+    wb, rows, header, col_idx = _open_sheet(path, column, sheet_name)
+    try:
+        if header is None:
+            return
+        width = len(header)
+        batch = []
+        for number, row in enumerate(rows, 2):
+            value = row[col_idx] if col_idx < len(row) else None
+            if value is None:
+                continue
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            batch.append(KeywordRow(number, str(value), row))
+            if len(batch) >= batch_size:
+                yield header, batch
+                batch = []
+        if batch:
+            yield header, batch
+    finally:
+        wb.close()
+
+
+def write_frames_xlsx(
+    path: str,
+    frames: Iterable,
+    sheet_name: str = "Sheet1",
+    max_rows: int = EXCEL_MAX_ROWS
+) -> int:
+    """
+    把逐批产生的 DataFrame 依次写入工作表（只写模式，边产生边落盘）
+
+    表头取第一批的列名；工作表写满 max_rows 行（含表头）后自动续写到"Sheet1_2"、"Sheet1_3"……
+    返回写入的数据行数。
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = None
+    header = None
+    rows = part = count = 0
+    for frame in frames:
+        if header is None:
+            header = list(frame.columns)
+        for row in frame.itertuples(index=False, name=None):
+            if ws is None or rows >= max_rows:
+                part += 1
+                ws = wb.create_sheet(_sheet_name(sheet_name, part))
+                ws.append(header)
+                rows = 1
+            ws.append(row)
+            rows += 1
+            count += 1
+    if ws is None:
+        ws = wb.create_sheet(sheet_name)
+        if header is not None:
+            ws.append(header)
+    _save(wb, path)
+    return count
+
+
+def write_grouped_xlsx(
+    path: str,
+    frames: Iterable,
+    group_column: str = "分组",
+    max_rows: int = EXCEL_MAX_ROWS
+) -> dict:
+    """
+    按分组列把逐批产生的 DataFrame 一次性分发到各分组工作表（只写模式）
+
+    每行只看一次，直接追加到所属分组的工作表；工作表按分组首次出现的顺序创建。
+    单个工作表写满 max_rows 行（含表头）后自动续写到"分组_2"、"分组_3"……
+
+    返回：{分组: 行数}
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    header = None
+    group_idx = None
+    sheets = {}  # 分组 -> [当前工作表, 当前表已写行数, 分表序号]
+    counts = {}
+    for frame in frames:
+        if header is None:
+            header = list(frame.columns)
+            group_idx = header.index(group_column)
+        for row in frame.itertuples(index=False, name=None):
+            group = row[group_idx]
+            state = sheets.get(group)
+            if state is None or state[1] >= max_rows:
+                part = state[2] + 1 if state else 1
+                ws = wb.create_sheet(_sheet_name(group, part))
+                ws.append(header)
+                state = sheets[group] = [ws, 1, part]
+            state[0].append(row)
+            state[1] += 1
+            counts[group] = counts.get(group, 0) + 1
+    if not sheets:
+        wb.create_sheet("Sheet1")
+    _save(wb, path)
+    return counts
+
+
+def _save(wb, path: str) -> None:
+    """先存到同目录的临时文件再替换目标文件：中途失败不会留下半个工作簿"""
+    tmp_path = f"{path}.{os.getpid()}.{id(wb):x}.tmp"
+    try:
+        wb.save(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _sheet_name(group, part: int) -> str:
+    """分组名转工作表名：去掉非法字符并截断到31个字符，续表加序号后缀"""
+    name = "".join("_" if ch in '[]:*?/\\' else ch for ch in str(group)) or "空"
+    suffix = f"_{part}" if part > 1 else ""
+    return name[:SHEET_NAME_LIMIT - len(suffix)] + suffix
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+城市 × 后缀 的地域词匹配
+
+原来的地域正则把两张表完全展开成 ({城市})[市]?{后缀}，分支数是两表长度的乘积，
+换成全国地市、区县名单（含别名）后会有几万个分支。这里按结构拆开匹配：
+城市名（含别名）装进一个自动机，命中后看一个可选的连接字（市/区/县），
+再从该位置沿后缀前缀树往下走。扫描代价只与关键词长度有关，与名单长短无关，
+命中结果直接带出城市和后缀。
+
+    geo = GeoMatcher(["北京", "上海"], ["培训", "机构"])
+    geo.search("北京市java培训")  -> None
+    geo.search("北京市培训机构")  -> GeoMatch(text='北京市培训', city='北京', connector='市', suffix='培训', start=0, end=5)
+"""
+import re
+from typing import Callable, Dict, Iterable, Mapping, NamedTuple, Optional, Tuple, Union
+
+from keyword_engine.automaton import AhoCorasick
+
+DEFAULT_CONNECTORS = "市区县"
+
+
+class GeoMatch(NamedTuple):
+    """地域词匹配结果：匹配到的原文、城市（规范名）、连接字、后缀、起止位置"""
+    text: str
+    city: str
+    connector: str
+    suffix: str
+    start: int
+    end: int
+
+
+class GeoMatcher:
+    """
+    城市 × [连接字] × 后缀 的组合匹配器
+
+    参数：
+    cities     - 城市名列表，或 {写法/别名: 规范名}（如 {"海淀区": "海淀", "海淀": "海淀"}）
+    suffixes   - 后缀列表
+    connectors - 城市与后缀之间可选的单个连接字（空字符串表示必须紧挨着）
+    flags      - 正则表达式标志，只看 re.IGNORECASE（与 KeywordMatcher 一致）
+    normalize  - 城市名、后缀的归一化函数；传入时 search() 的文本应已用同一函数归一化
+
+    search() 返回最靠左的匹配；同一起点优先更长的城市写法，其次带连接字、更长的后缀。
+    """
+
+    def __init__(
+        self,
+        cities: Union[Iterable[str], Mapping[str, str]],
+        suffixes: Iterable[str],
+        connectors: str = DEFAULT_CONNECTORS,
+        flags: re.RegexFlag = re.IGNORECASE,
+        normalize: Optional[Callable[[str], str]] = None
+    ):
+        self.ignore_case = bool(flags & re.IGNORECASE)
+        self.connectors = connectors.lower() if self.ignore_case else connectors
+        normalize = normalize or (lambda term: term)
+        names = cities.items() if isinstance(cities, Mapping) else ((city, city) for city in cities)
+        entries = []
+        for name, city in names:
+            term = self._fold(normalize(name))
+            if term:
+                # 附带数据带上写法长度，由命中结尾位置倒推起点
+                entries.append((term, (len(term), city)))
+        self._max_city = max((len(term) for term, _ in entries), default=0)
+        self._cities = AhoCorasick(entries, ignore_case=False)
+        # 后缀前缀树：字符 -> 子节点，"" 键存放在此结束的后缀
+        self._suffixes: Dict[str, dict] = {}
+        for suffix in suffixes:
+            term = self._fold(normalize(suffix))
+            if not term:
+                continue
+            node = self._suffixes
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node.setdefault("", suffix)
+
+    def _fold(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def _suffix_at(self, text: str, pos: int) -> Optional[Tuple[int, str]]:
+        """从 pos 开始能匹配到的最长后缀：(结束位置, 后缀)"""
+        node = self._suffixes
+        found = None
+        for i in range(pos, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if "" in node:
+                found = (i + 1, node[""])
+        return found
+
+    def _match_after(self, text: str, pos: int) -> Optional[Tuple[str, int, str]]:
+        """城市名之后：[连接字] 后缀，返回 (连接字, 结束位置, 后缀)"""
+        if pos < len(text) and text[pos] in self.connectors:
+            found = self._suffix_at(text, pos + 1)
+            if found is not None:
+                return text[pos], found[0], found[1]
+        found = self._suffix_at(text, pos)
+        if found is not None:
+            return "", found[0], found[1]
+        return None
+
+    def search(self, text: str) -> Optional[GeoMatch]:
+        """找出最靠左的 城市[连接字]后缀，兼容 re.Pattern.search 的真假判断"""
+        folded = self._fold(text)
+        best = None
+        best_key = None
+        for end, (length, city) in self._cities.iter_hits(folded):
+            start = end + 1 - length
+            if best_key is not None:
+                if end + 1 - self._max_city > best_key[0]:
+                    # 后面的命中起点只会更靠右
+                    break
+                if (start, -length) >= best_key:
+                    continue
+            after = self._match_after(folded, end + 1)
+            if after is None:
+                continue
+            connector, stop, suffix = after
+            best_key = (start, -length)
+            best = GeoMatch(text[start:stop], city, text[end + 1:end + 1 + len(connector)], suffix, start, stop)
+        return best
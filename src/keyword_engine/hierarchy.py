@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+层级词根打标
+
+多级词根字典（主类 -> 子类 -> ... -> [词根]）中每个叶子类别占一个比特位，
+每个词根只进自动机一次，命中后得到叶子类别的位图；
+上级类别的命中由叶子位图按前缀掩码汇总得到，不再重复匹配。
+"""
+import re
+from typing import Callable, Dict, List, Optional
+
+from keyword_engine.automaton import AhoCorasick
+
+
+class HierarchyLabeler:
+    """
+    层级词根打标器
+
+    参数：
+    keyword_roots - 多级词根字典，叶子为词根列表；非 dict/list 的值（如 age_limit）会被忽略
+    flags         - 正则表达式标志（默认忽略大小写）
+    sep           - 类别路径分隔符（默认"."）
+    normalize     - 词根归一化函数；传入时 scan() 的文本应已用同一函数归一化
+    """
+
+    def __init__(
+        self,
+        keyword_roots: Dict,
+        flags: re.RegexFlag = re.IGNORECASE,
+        sep: str = ".",
+        normalize: Optional[Callable[[str], str]] = None
+    ):
+        self.sep = sep
+        # 第 i 位对应的叶子类别，如 "course.languages"
+        self.labels: List[str] = []
+        # 每个类别路径（含各级上级类别）覆盖的叶子位掩码
+        self.masks: Dict[str, int] = {}
+        items = []
+        self._walk(keyword_roots, [], items, normalize or (lambda term: term))
+        self._automaton = AhoCorasick(items, ignore_case=bool(flags & re.IGNORECASE))
+
+    def _walk(self, node, path: List[str], items: list, normalize: Callable[[str], str]) -> None:
+        for name, value in node.items():
+            current_path = path + [name]
+            if isinstance(value, dict):
+                self._walk(value, current_path, items, normalize)
+            elif isinstance(value, (list, tuple)):
+                bit = 1 << len(self.labels)
+                self.labels.append(self.sep.join(current_path))
+                for depth in range(1, len(current_path) + 1):
+                    key = self.sep.join(current_path[:depth])
+                    self.masks[key] = self.masks.get(key, 0) | bit
+                items.extend((normalize(term), bit) for term in value)
+
+    def scan(self, text: str) -> int:
+        """扫描一遍关键词，返回命中的叶子类别位图"""
+        mask = 0
+        for _, bit in self._automaton.iter_hits(text):
+            mask |= bit
+        return mask
+
+    def has(self, mask: int, category: str) -> bool:
+        """位图中是否有该类别（任意层级）下的命中"""
+        return bool(mask & self.masks.get(category, 0))
+
+    def leaves(self, mask: int) -> List[str]:
+        """位图对应的叶子类别，按词根字典中的顺序排列"""
+        return [label for i, label in enumerate(self.labels) if mask >> i & 1]
+
+    def rollup(self, mask: int, depth: int = 1) -> List[str]:
+        """把叶子命中汇总到指定层级的类别（depth=1 即主类）"""
+        result = []
+        for label in self.leaves(mask):
+            key = self.sep.join(label.split(self.sep)[:depth])
+            if key not in result:
+                result.append(key)
+        return result
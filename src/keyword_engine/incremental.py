@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+规则修改后的增量重分类
+
+关键词的分类结果只取决于它命中了哪些否定词、品牌词和叶子条件。改了某个叶子条件后，
+只有在新旧任一版本下可能命中被改条件的关键词，结果才可能变化；而"可能命中"
+可以用条件的必需字面词（见 rules.required_literals）判断。
+
+IncrementalIndex 保存上一次全量分类的关键词、结果和 字面词 -> 关键词编号 的倒排索引。
+规则修改后先比较新旧规则集，得到改动的条件和它们的必需字面词，再从倒排索引取出
+包含这些字面词的关键词重新分类，把结果补丁到已存结果上。
+
+    index = IncrementalIndex.build(old_classifier, keywords)
+    index.save(path)
+    ...
+    index = IncrementalIndex.load(path)
+    changed = index.update(new_classifier)
+
+update 只改索引里的结果。已写出的结果文件用 patch_results 改写受影响的行（其余行原样保留），
+文件登记在变更清单里时再用 ChangeManifest.patch 把清单切到新规则集，下次运行就不会整个文件重跑：
+
+    patched = index.patch_results(changed, "./result/关键词分类.csv")
+    with ChangeManifest() as manifest:
+        manifest.patch("./keyword/关键词.xlsx", new_ruleset, patched)
+    index.save(path)
+"""
+import os
+import pickle
+from array import array
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set
+
+from keyword_engine.automaton import AhoCorasick
+from keyword_engine.rules import required_literals
+
+DEFAULT_INDEX_PATH = "./cache/incremental_index.pkl"
+
+
+class RulesetDiff(NamedTuple):
+    """
+    新旧规则集的差异
+
+    changed  - 改动（新增、删除、条件变化）的条件路径
+    literals - 受影响关键词必然包含其中之一的字面词；None 表示无法缩小范围，需要全量重跑
+    """
+    changed: List[tuple]
+    literals: Optional[Set[str]]
+
+
+def _conditions(classifier) -> Dict[tuple, object]:
+    """{条件路径: 条件AST}；否定词、品牌词按先后顺序生效，位置也算在路径里"""
+    conditions = {}
+    for i, (key, ast) in enumerate(classifier.negatives):
+        conditions[('否定词', i, key)] = ast
+    for i, (key, ast) in enumerate(classifier.brands):
+        conditions[('品牌词', i, key)] = ast
+    stack = [((key,), node) for key, node in classifier.root.items()]
+    while stack:
+        path, node = stack.pop()
+        if node['children']:
+            stack.extend((path + (key,), child) for key, child in node['children'].items())
+        else:
+            conditions[path] = node['condition']
+    return conditions
+
+
+def diff_rulesets(old, new) -> RulesetDiff:
+    """比较两个 KeywordClassifier，返回改动的条件以及受影响关键词的必需字面词"""
+    if old.case_sensitive != new.case_sensitive:
+        # 归一化方式变了，所有条件都算改动
+        return RulesetDiff(sorted(set(_conditions(old)) | set(_conditions(new))), None)
+    old_conditions = _conditions(old)
+    new_conditions = _conditions(new)
+    changed = [
+        path for path in {**old_conditions, **new_conditions}
+        if path not in old_conditions or path not in new_conditions
+        or old_conditions[path] != new_conditions[path]
+    ]
+    literals = set()
+    for path in changed:
+        for classifier, conditions in ((old, old_conditions), (new, new_conditions)):
+            ast = conditions.get(path)
+            if ast is None:
+                continue
+            required = required_literals(ast, classifier.atoms.literals)
+            if required is None:
+                return RulesetDiff(changed, None)
+            literals |= required
+    return RulesetDiff(changed, literals)
+
+
+class IncrementalIndex:
+    """
+    上一次全量分类的结果和 字面词 -> 关键词编号 倒排索引
+
+    参数：
+    classifier - 产生当前结果的 KeywordClassifier
+    keywords   - 归一化后的不同关键词
+    results    - 与 keywords 等长的分类结果
+    """
+
+    def __init__(self, classifier, keywords: List[str], results: List[str]):
+        self.classifier = classifier
+        self.keywords = keywords
+        self.results = results
+        self._positions = {kw: i for i, kw in enumerate(keywords)}
+        self._postings: Dict[str, array] = {}
+        self._index_literals(_all_literals(classifier))
+
+    @classmethod
+    def build(cls, classifier, keywords: Iterable[str], workers: Optional[int] = None) -> "IncrementalIndex":
+        """全量分类一遍关键词（按归一化结果去重）并建立索引"""
+        unique = list(dict.fromkeys(classifier.normalize(kw) for kw in keywords))
+        results = classifier.classify_batch(unique, workers=workers, unique=False)
+        return cls(classifier, unique, list(results))
+
+    def _index_literals(self, literals: Set[str]) -> None:
+        """扫描一遍语料，为尚未建索引的字面词补上倒排表"""
+        literals = {lit for lit in literals if lit and lit not in self._postings}
+        if not literals:
+            return
+        for lit in literals:
+            self._postings[lit] = array('I')
+        automaton = AhoCorasick(((lit, lit) for lit in literals), ignore_case=False)
+        for i, kw in enumerate(self.keywords):
+            for lit in automaton.payloads(kw):
+                self._postings[lit].append(i)
+
+    def affected(self, literals: Optional[Set[str]]) -> List[int]:
+        """包含任一字面词的关键词编号（literals 为 None 时返回全部）"""
+        if literals is None:
+            return list(range(len(self.keywords)))
+        self._index_literals(literals)
+        ids = set()
+        for lit in literals:
+            ids.update(self._postings.get(lit, ()))
+        return sorted(ids)
+
+    def update(self, classifier, workers: Optional[int] = None) -> Dict[str, tuple]:
+        """
+        换成新规则集：只重分类可能受影响的关键词，补丁结果，返回 {关键词: (旧结果, 新结果)}
+
+        改动无法缩小范围时（如改成纯排除条件、自定义正则）对全部关键词重跑。
+        已写出的结果文件不会跟着变，需要再调用 patch_results
+        """
+        if classifier.case_sensitive != self.classifier.case_sensitive:
+            # 语料按旧的归一化方式存储，无法还原
+            raise ValueError("case_sensitive changed, rebuild the index from the original keywords")
+        diff = diff_rulesets(self.classifier, classifier)
+        ids = self.affected(diff.literals) if diff.changed else []
+        results = classifier.classify_batch([self.keywords[i] for i in ids], workers=workers, unique=False)
+        changes = {}
+        for i, result in zip(ids, results):
+            if result != self.results[i]:
+                changes[self.keywords[i]] = (self.results[i], result)
+                self.results[i] = result
+        self.classifier = classifier
+        return changes
+
+    def patch_results(
+        self,
+        changes: Mapping[str, tuple],
+        path: str,
+        keyword_column: str = "关键词",
+        result_column: Optional[str] = None,
+        fmt: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        把 update 返回的改动写回结果文件（CSV / JSONL / Parquet），其余行原样保留
+
+        参数：
+        changes        - update 的返回值 {归一化关键词: (旧结果, 新结果)}
+        path           - 结果文件
+        keyword_column - 关键词列
+        result_column  - 分类结果列（默认最后一列）
+        fmt            - 格式（默认按扩展名）
+
+        逐批读出再写到临时文件，写完才替换原文件。
+        返回改写的行 {原始关键词: 新结果}，可交给 ChangeManifest.patch。
+        """
+        from keyword_engine.sinks import iter_frames, open_sink
+
+        patched = {}
+        if not changes:
+            return patched
+        normalize = self.classifier.normalize
+        sink = None
+        try:
+            for frame in iter_frames(path, fmt=fmt):
+                if sink is None:
+                    columns = list(frame.columns)
+                    column = columns.index(result_column or columns[-1])
+                    sink = open_sink(path, columns, fmt)
+                for i, kw in enumerate(frame[keyword_column]):
+                    change = changes.get(normalize(kw))
+                    if change is not None:
+                        frame.iat[i, column] = patched[kw] = change[1]
+                sink.write_frame(frame)
+        except BaseException:
+            if sink is not None:
+                sink.abort()
+            raise
+        if sink is not None:
+            sink.close()
+        return patched
+
+    def lookup(self, keywords: Iterable[str]) -> List[Optional[str]]:
+        """按原始关键词取已存结果（不在语料中的返回 None）"""
+        normalize = self.classifier.normalize
+        positions = self._positions
+        return [
+            self.results[positions[kw]] if kw in positions else None
+            for kw in (normalize(k) for k in keywords)
+        ]
+
+    def add(self, keywords: Iterable[str], workers: Optional[int] = None) -> int:
+        """把新关键词分类后并入语料和索引，返回新增条数"""
+        new = [kw for kw in dict.fromkeys(self.classifier.normalize(k) for k in keywords)
+               if kw not in self._positions]
+        if not new:
+            return 0
+        start = len(self.keywords)
+        results = self.classifier.classify_batch(new, workers=workers, unique=False)
+        automaton = AhoCorasick(((lit, lit) for lit in self._postings), ignore_case=False)
+        for offset, (kw, result) in enumerate(zip(new, results)):
+            i = start + offset
+            self.keywords.append(kw)
+            self.results.append(result)
+            self._positions[kw] = i
+            for lit in automaton.payloads(kw):
+                self._postings[lit].append(i)
+        return len(new)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # 位置表可由关键词列表重建
+        state.pop('_positions', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._positions = {kw: i for i, kw in enumerate(self.keywords)}
+
+    def save(self, path: str = DEFAULT_INDEX_PATH) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str = DEFAULT_INDEX_PATH) -> "IncrementalIndex":
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def _all_literals(classifier) -> Set[str]:
+    """规则集中出现的全部字面词"""
+    return {lit for lits in classifier.atoms.literals.values() if lits for lit in lits}
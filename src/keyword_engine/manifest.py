@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+关键词文件变更清单
+
+keyword/ 下各产品的导出文件只会追加或少量修改。清单记录每个文件的内容哈希，
+以及文件中每个不同关键词的哈希和分类结果（按关键词哈希存，与所在行无关）：
+- 文件哈希、规则集和输出文件都没变时整个文件跳过；
+- 否则逐行查关键词哈希，只对新出现的关键词分类，其余行直接取已存结果，
+  按原表行顺序合并后重新写出 result/ 下的结果文件。中间插入、删除、调换行都不会让其他行重新分类。
+输入按整行读取（excel_io.iter_row_batches），写出时可以带上原表的其他列。
+"""
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import time
+from typing import Callable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from keyword_engine.excel_io import DEFAULT_BATCH_SIZE, KEYWORD_COLUMN, KeywordRow, iter_row_batches
+
+DEFAULT_MANIFEST_PATH = "./cache/manifest.sqlite"
+# 单条 SQL 中 IN (...) 的参数个数上限
+_SQL_CHUNK = 500
+# 计算文件哈希时每次读取的字节数
+_READ_SIZE = 1 << 20
+
+
+def file_hash(path: str) -> str:
+    """文件内容的 sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_READ_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def keyword_hash(keyword: str) -> str:
+    """关键词的内容哈希（清单按它存结果）"""
+    return hashlib.blake2b(keyword.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ChangeManifest:
+    """
+    文件级 + 关键词级变更清单（SQLite）
+
+    参数：
+    path - 清单数据库路径
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " source TEXT PRIMARY KEY, sha256 TEXT NOT NULL, ruleset TEXT NOT NULL,"
+            " output TEXT NOT NULL, rows INTEGER NOT NULL, updated REAL NOT NULL)"
+        )
+        # 旧版本按行号存的结果：行号一变就全部失效，不再使用
+        self._conn.execute("DROP TABLE IF EXISTS rows")
+        # seen 为最近一次出现在文件中的处理批次，文件处理完后删掉本次没出现的关键词
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS keywords ("
+            " source TEXT NOT NULL, hash TEXT NOT NULL, result TEXT NOT NULL, seen REAL NOT NULL,"
+            " PRIMARY KEY (source, hash)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def is_unchanged(self, source: str, ruleset: str, output: str, sha256: Optional[str] = None) -> bool:
+        """文件内容、规则集、输出路径都与上次一致且输出文件还在"""
+        row = self._conn.execute(
+            "SELECT sha256, ruleset, output FROM files WHERE source = ?", (source,)
+        ).fetchone()
+        if row is None or not os.path.exists(output):
+            return False
+        return row == (sha256 or file_hash(source), ruleset, output)
+
+    def _merge(
+        self,
+        source: str,
+        batches: Iterable[Tuple[tuple, List[KeywordRow]]],
+        classify_many: Callable[[List[str]], Sequence],
+        reuse: bool,
+        run: float,
+        stats: dict
+    ) -> Iterator[Tuple[List[KeywordRow], list]]:
+        """逐批按关键词哈希取已存结果，只对新出现的关键词调用 classify_many，产出 (原表行, 结果) 批次"""
+        for _, rows in batches:
+            hashes = [keyword_hash(row.keyword) for row in rows]
+            # 本批中每个不同的关键词（哈希 -> 第一次出现的关键词）
+            first_seen = {}
+            for row, h in zip(rows, hashes):
+                first_seen.setdefault(h, row.keyword)
+            known = {}
+            if reuse:
+                unique = list(first_seen)
+                for i in range(0, len(unique), _SQL_CHUNK):
+                    chunk = unique[i:i + _SQL_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    known.update(self._conn.execute(
+                        f"SELECT hash, result FROM keywords WHERE source = ? AND hash IN ({placeholders})",
+                        [source, *chunk]
+                    ))
+                    self._conn.execute(
+                        f"UPDATE keywords SET seen = ? WHERE source = ? AND hash IN ({placeholders})",
+                        [run, source, *chunk]
+                    )
+            results = {h: json.loads(result) for h, result in known.items()}
+            todo = [h for h in first_seen if h not in results]
+            if todo:
+                for h, result in zip(todo, classify_many([first_seen[h] for h in todo])):
+                    results[h] = result
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO keywords (source, hash, result, seen) VALUES (?, ?, ?, ?)",
+                    [(source, h, json.dumps(results[h], ensure_ascii=False), run) for h in todo]
+                )
+                # 同一批里重复的新关键词只分类一次，按行计数
+                new = set(todo)
+                stats["classified"] += sum(1 for h in hashes if h in new)
+            stats["rows"] += len(rows)
+            yield rows, [results[h] for h in hashes]
+
+    def patch(self, source: str, ruleset: str, results: Mapping[str, object]) -> int:
+        """
+        规则修改后结果文件已就地打过补丁（如 IncrementalIndex.patch_results）时，同步清单
+
+        results 为改写过的 {原始关键词: 新结果}：改写已存结果，并把文件登记到新规则集，
+        源文件和输出不变时下次 update_file 直接跳过。文件不在清单里时什么也不做，返回 0。
+        返回改写的关键词数。
+        """
+        if self._conn.execute("SELECT 1 FROM files WHERE source = ?", (source,)).fetchone() is None:
+            return 0
+        try:
+            cursor = self._conn.executemany(
+                "UPDATE keywords SET result = ? WHERE source = ? AND hash = ?",
+                [(json.dumps(result, ensure_ascii=False), source, keyword_hash(kw)) for kw, result in results.items()]
+            )
+            self._conn.execute(
+                "UPDATE files SET ruleset = ?, updated = ? WHERE source = ?", (ruleset, time.time(), source)
+            )
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            raise
+        return cursor.rowcount
+
+    def update_file(
+        self,
+        source: str,
+        output: str,
+        ruleset: str,
+        classify_many: Callable[[List[str]], Sequence],
+        write: Callable[[tuple, Iterator[Tuple[List[KeywordRow], list]]], object],
+        column: str = KEYWORD_COLUMN,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Optional[dict]:
+        """
+        增量处理一个关键词文件
+
+        参数：
+        source        - 关键词工作簿
+        output        - 结果文件路径（只用于判断是否需要重写，由 write 负责写出）
+        ruleset       - 规则集哈希（应包含 engine_fingerprint()），规则或引擎变了所有关键词都重新分类
+        classify_many - 批量分类函数，返回等长的可 JSON 序列化结果
+        write         - 接收 (原表表头, (原表行列表, 结果列表) 批次迭代器) 并写出 output，
+                        如 sinks.write_row_batches
+        column        - 关键词列表头
+        batch_size    - 每批行数
+
+        文件未变化时返回 None；否则返回 {"rows": 总行数, "classified": 新分类行数}。
+        write 成功返回后清单才提交，中途失败不会把文件标记为已处理。
+        """
+        sha256 = file_hash(source)
+        if self.is_unchanged(source, ruleset, output, sha256):
+            return None
+        previous = self._conn.execute("SELECT ruleset FROM files WHERE source = ?", (source,)).fetchone()
+        reuse = previous is not None and previous[0] == ruleset
+        stats = {"rows": 0, "classified": 0}
+        run = time.time()
+        try:
+            # 先取第一批拿到表头，输出要先写表头；空工作簿只写关键词列
+            batches = iter_row_batches(source, column, batch_size)
+            first = next(batches, None)
+            header = first[0] if first else (column,)
+            batches = itertools.chain([first], batches) if first else batches
+            write(header, self._merge(source, batches, classify_many, reuse, run, stats))
+            # 删掉本次文件中已经没有的关键词
+            self._conn.execute("DELETE FROM keywords WHERE source = ? AND seen <> ?", (source, run))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (source, sha256, ruleset, output, rows, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (source, sha256, ruleset, output, stats["rows"], time.time())
+            )
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            raise
+        return stats
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+关键词归一化
+
+所有分类器共用的前置步骤：全角转半角（NFKC）、大小写折叠、去掉空白和常见标点。
+例如"北大青鸟 学校"与"北大青鸟学校"、"ＪＡＶＡ培训"与"java培训"得到同一个键。
+词根在建模时用同一个函数归一化，匹配阶段即可直接用区分大小写的快速模式。
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+NORMALIZE_CACHE_SIZE = 65536
+
+# 归一化时删除的标点（NFKC 之后的形式）；"#"、"+"、"-"、"/" 等出现在
+# c#、c++ 这类词根里，予以保留
+PUNCTUATION = ",.;:?!'\"()[]{}<>。、“”‘’【】《》「」『』…·~"
+_DELETE_PUNCTUATION = str.maketrans("", "", PUNCTUATION)
+_STRIP_PATTERN = r"[\s" + re.escape(PUNCTUATION) + r"]+"
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_keyword(text: str, fold_case: bool = True) -> str:
+    """
+    归一化单个关键词（结果有缓存，同一关键词在多个分类器间只计算一次）
+
+    参数：
+    text      - 原始关键词
+    fold_case - 是否折叠大小写（区分大小写的规则集应传 False）
+    """
+    text = unicodedata.normalize("NFKC", text)
+    if fold_case:
+        text = text.casefold()
+    return "".join(text.translate(_DELETE_PUNCTUATION).split())
+
+
+def normalize_series(series, fold_case: bool = True):
+    """对 pandas 字符串列做同样的归一化（向量化实现，空值保持为空）"""
+    series = series.str.normalize("NFKC")
+    if fold_case:
+        series = series.str.casefold()
+    return series.str.replace(_STRIP_PATTERN, "", regex=True)
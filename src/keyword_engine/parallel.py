@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+多进程并行分类
+
+分类器（已编译好的规则树）通过进程池的 initializer 在每个工作进程里只传一次，
+之后每个任务只传一批关键词，结果按输入顺序返回。
+
+classify_parallel 每次调用都新开一个进程池。逐批处理文件时用 ClassifierPool，
+进程池和工作进程里的分类器在整个处理过程中复用：
+
+    with ClassifierPool(classifier, workers=8) as pool:
+        for batch in batches:
+            results = pool.classify(batch)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# 工作进程内的分类器，由 _init_worker 设置
+_worker_classifier = None
+
+
+def _init_worker(classifier) -> None:
+    global _worker_classifier
+    _worker_classifier = classifier
+
+
+def _classify_chunk(chunk: Sequence[str]) -> List[str]:
+    classify = _worker_classifier.classify
+    return [classify(text) for text in chunk]
+
+
+class ClassifierPool:
+    """
+    可复用的分类进程池
+
+    参数：
+    classifier - 任何带 classify(text) 方法且可 pickle 的分类器
+    workers    - 进程数（默认CPU核数；为1时在当前进程内顺序执行）
+    chunk_size - 每个任务的关键词数量
+
+    进程池在第一次需要并行时才启动，分类器随之传给每个工作进程一次；
+    可作为上下文管理器使用，退出时关闭进程池。
+    """
+
+    def __init__(self, classifier, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.classifier = classifier
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def classify(self, texts: Sequence[str]) -> List[str]:
+        """返回与 texts 顺序一致的分类结果列表；只有一个任务时在当前进程内执行"""
+        texts = list(texts)
+        chunk_size = self.chunk_size
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        if self.workers == 1 or len(chunks) <= 1:
+            classify = self.classifier.classify
+            return [classify(text) for text in texts]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.classifier,)
+            )
+        results = []
+        for part in self._executor.map(_classify_chunk, chunks):
+            results.extend(part)
+        return results
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def classify_parallel(
+    classifier,
+    texts: Sequence[str],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    pool: Optional[ClassifierPool] = None
+) -> List[str]:
+    """
+    用进程池并行调用 classifier.classify
+
+    参数：
+    classifier - 任何带 classify(text) 方法且可 pickle 的分类器
+    texts      - 关键词序列
+    workers    - 进程数（默认CPU核数；为1时在当前进程内顺序执行）
+    chunk_size - 每个任务的关键词数量
+    pool       - 复用的 ClassifierPool（须是同一个分类器的）；给出时忽略 workers、chunk_size
+
+    返回：与 texts 顺序一致的分类结果列表
+    """
+    if pool is not None:
+        if pool.classifier is not classifier:
+            raise ValueError("pool was created for a different classifier")
+        return pool.classify(texts)
+    texts = list(texts)
+    # 只用一次的进程池：进程数不超过任务数
+    chunks = -(-len(texts) // chunk_size)
+    with ClassifierPool(classifier, min(workers or os.cpu_count() or 1, max(chunks, 1)), chunk_size) as pool:
+        return pool.classify(texts)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+规则命中计数与耗时统计
+
+按规则节点或原子记录：求值次数、命中次数、累计耗时、单个关键词的最长耗时，
+报告可导出为 JSON / CSV，用来找出拖慢分类的规则和从不命中的规则。
+
+统计通过把匹配函数替换成带计时的包装函数实现，只在调用 instrument 之后生效；
+不开启时分类器用的仍是原来的函数，没有任何额外判断。
+
+    stats = RuleStats()
+    classifier.instrument(stats)           # KeywordClassifier / EnhancedTokenizer
+    patterns = instrument_patterns(patterns, stats)   # build_regex_patterns 的结果
+    ...
+    stats.to_csv("./result/规则统计.csv")
+"""
+import csv
+import json
+import time
+from typing import Callable, Dict, List
+
+# 报告列
+REPORT_FIELDS = ["rule", "evaluations", "matches", "total_ms", "mean_us", "max_us"]
+
+
+class RuleStats:
+    """按规则名累计的求值次数、命中次数、累计耗时和最长单次耗时"""
+
+    def __init__(self):
+        # 规则名 -> [求值次数, 命中次数, 累计纳秒, 最长纳秒]
+        self._entries: Dict[str, list] = {}
+
+    def entry(self, name: str) -> list:
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._entries[name] = [0, 0, 0, 0]
+        return entry
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """返回记录统计的包装函数，结果为真即算一次命中"""
+        entry = self.entry(name)
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed(*args):
+            start = perf_counter_ns()
+            result = func(*args)
+            elapsed = perf_counter_ns() - start
+            entry[0] += 1
+            if result:
+                entry[1] += 1
+            entry[2] += elapsed
+            if elapsed > entry[3]:
+                entry[3] = elapsed
+            return result
+        timed.__wrapped__ = func
+        return timed
+
+    def count(self, name: str, hit: bool) -> None:
+        """只计数不计时（如一次扫描得到的多个类别的命中）"""
+        entry = self.entry(name)
+        entry[0] += 1
+        if hit:
+            entry[1] += 1
+
+    def reset(self) -> None:
+        for entry in self._entries.values():
+            entry[:] = [0, 0, 0, 0]
+
+    def report(self) -> List[dict]:
+        """按累计耗时从高到低排列的统计行"""
+        rows = []
+        for name, (evaluations, matches, total, worst) in self._entries.items():
+            rows.append({
+                "rule": name,
+                "evaluations": evaluations,
+                "matches": matches,
+                "total_ms": round(total / 1e6, 3),
+                "mean_us": round(total / evaluations / 1e3, 3) if evaluations else 0.0,
+                "max_us": round(worst / 1e3, 3),
+            })
+        rows.sort(key=lambda row: (-row["total_ms"], row["rule"]))
+        return rows
+
+    def dead_rules(self) -> List[str]:
+        """求值过但从未命中的规则"""
+        return [name for name, entry in self._entries.items() if entry[0] and not entry[1]]
+
+    def to_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def to_csv(self, path: str) -> None:
+        # 带 BOM，Excel 直接打开不乱码
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.report())
+
+
+class _InstrumentedPattern:
+    """给 build_regex_patterns 结果中的单个匹配对象加统计的代理"""
+
+    def __init__(self, target, name: str, stats: RuleStats):
+        self._target = target
+        self._name = name
+        self._stats = stats
+        for method in ("search", "match", "fullmatch"):
+            if hasattr(target, method):
+                setattr(self, method, stats.wrap(f"{name}.{method}", getattr(target, method)))
+        if hasattr(target, "scan"):
+            self._scan = stats.wrap(f"{name}.scan", target.scan)
+
+    def scan(self, text):
+        result = self._scan(text)
+        # 一次扫描覆盖多个类别，逐个类别记命中次数
+        if isinstance(result, dict):
+            for category in self._target.categories:
+                self._stats.count(f"{self._name}[{category}]", category in result)
+        elif isinstance(result, int):
+            for i, label in enumerate(self._target.labels):
+                self._stats.count(f"{self._name}[{label}]", bool(result >> i & 1))
+        return result
+
+    def __getattr__(self, attr):
+        return getattr(self._target, attr)
+
+
+def instrument_patterns(patterns: dict, stats: RuleStats) -> dict:
+    """返回带统计的 patterns 副本（原 patterns 不变，不需要统计时继续用原对象）"""
+    return {name: _InstrumentedPattern(pattern, name, stats) for name, pattern in patterns.items()}
@@ -0,0 +1,711 @@
+# -*- coding: utf-8 -*-
+"""
+规则DSL分类器
+
+条件语法：& 与、| 或、- 非（前缀或 a-b 形式）、() 分组、^词^ 全匹配、
+{通配符} 引用通配符字典、$##正则##$ 自定义正则。
+配置中 dict 为分组节点，字符串（或字符串列表）为叶子条件。
+关键词和规则中的字面词、通配符取值都先经 normalize_keyword 归一化，
+字面匹配按区分大小写进行；只有自定义正则在不区分大小写时保留 IGNORECASE。
+"""
+import builtins
+import copy
+import marshal
+import re
+import sys
+import types
+from collections import Counter, namedtuple
+
+from keyword_engine.automaton import AhoCorasick
+from keyword_engine.normalize import normalize_keyword
+from keyword_engine.wildcard import WildcardPattern, WildcardSet
+
+# 定义AST节点类型
+ExactNode = namedtuple('ExactNode', ['pattern', 'is_boundary'])
+WildcardNode = namedtuple('WildcardNode', ['patterns', 'is_boundary'])
+ComplexRegexNode = namedtuple('ComplexRegexNode', ['regex', 'is_boundary'])
+AndNode = namedtuple('AndNode', ['left', 'right'])
+OrNode = namedtuple('OrNode', ['left', 'right'])
+NotNode = namedtuple('NotNode', ['child'])
+
+class AtomTable:
+    """
+    整个配置共享的原子表
+
+    同一个原子（同一写法的词、通配符、正则）只编译一次；归一化后模式相同的原子
+    合并为同一个节点，并分配一个编号，用于每个关键词的原子结果 memo；
+    同时记录每个原子命中所需的字面词（见 Parser._atom_literals）；
+    {通配符} 字典每个只构建一个 WildcardSet，所有引用它的原子共用
+    """
+    def __init__(self):
+        self.by_token = {}
+        self.index = {}
+        self.nodes = []
+        self.literals = {}
+        self.wildcards = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def intern(self, token, build, literals=None):
+        node = self.by_token.get(token)
+        if node is None:
+            node = build()
+            if node in self.index:
+                node = self.nodes[self.index[node]]
+            else:
+                self.index[node] = len(self.nodes)
+                self.nodes.append(node)
+                self.literals[node] = literals() if literals else None
+            self.by_token[token] = node
+        return node
+
+class KeywordClassifier:
+    def __init__(self, config, wildcard, case_sensitive=True):
+        self.config = config
+        self.wildcard = wildcard
+        self.case_sensitive = case_sensitive
+        self.atoms = AtomTable()
+        local_config = copy.deepcopy(config)
+        
+        self.negatives = self._process_negatives(local_config.pop('否定词', {}))
+        self.brands = self._process_brands(local_config.pop('品牌词', {}))
+        self.root = self._build_classifier(local_config) 
+        self._compile()
+        self._build_prefilter()
+
+    def _compile(self, codes=None):
+        """
+        把所有条件AST编译成判定函数，并给否定词、品牌词和规则树节点编号（AST 保留）
+
+        codes 为 {编号: 生成函数的代码对象}（见 __getstate__），给出时直接重建函数，
+        省掉逐条生成和编译源码；缺失的条件仍从 AST 编译。
+        """
+        index = self.atoms.index
+        codes = codes or {}
+        bound = {}
+
+        def matcher(nid, ast):
+            if ast is None:
+                return None
+            code = codes.get(nid)
+            if code is not None:
+                return _load_condition(code, self.atoms.nodes, bound)
+            return compile_condition(ast, index)
+
+        # 编号：先否定词、品牌词，再按键排序先序遍历规则树，兄弟节点的编号顺序即键的顺序
+        nid = 0
+        self._negative_matchers = []
+        self._brand_matchers = []
+        for asts, entries in ((self.negatives, self._negative_matchers), (self.brands, self._brand_matchers)):
+            for key, ast in asts:
+                entries.append((key, matcher(nid, ast), nid))
+                nid += 1
+        self._tree = {}      # 编号 -> (键, 节点)
+        self._parent = {}    # 编号 -> 父节点编号（顶层为 -1）
+        stack = [(key, node, -1) for key, node in reversed(sorted(self.root.items()))]
+        while stack:
+            key, node, parent = stack.pop()
+            node['match'] = matcher(nid, node['condition'])
+            self._tree[nid] = (key, node)
+            self._parent[nid] = parent
+            stack.extend((k, child, nid) for k, child in reversed(sorted(node['children'].items())))
+            nid += 1
+
+    def _build_prefilter(self):
+        """
+        必需字面词索引
+
+        对每个条件算出"命中时关键词必然包含其中之一"的字面词集合，按字面词建倒排索引。
+        分类时先用一个自动机扫一遍关键词得到候选叶子，再沿父节点向上补齐候选分组，
+        其余子树直接跳过；无法确定字面词的条件每次都参与判断。
+        """
+        literals = self.atoms.literals
+        conditions = {
+            nid: ast
+            for (_, _, nid), (_, ast) in zip(self._negative_matchers + self._brand_matchers,
+                                             self.negatives + self.brands)
+        }
+        conditions.update((nid, node['condition']) for nid, (_, node) in self._tree.items() if not node['children'])
+        # 字面词在所有条件中的出现次数，用来为"与"挑选最有区分度的一侧
+        frequency = Counter(
+            lit for ast in conditions.values() if ast is not None
+            for atom in _iter_atoms(ast) for lit in (literals.get(atom) or ())
+        )
+
+        items = []
+        self._always = set()
+        for nid, ast in conditions.items():
+            # 没有条件的空分组永远不会命中
+            required = required_literals(ast, literals, frequency) if ast is not None else set()
+            if required is None:
+                self._always.add(nid)
+            else:
+                items.extend((lit, nid) for lit in required)
+        self._prefilter = AhoCorasick(items, ignore_case=False)
+
+    def candidates(self, text):
+        """关键词（已归一化）可能命中的否定词、品牌词和叶子节点编号集合"""
+        return self._prefilter.payloads(text) | self._always
+
+    def instrument(self, stats=None):
+        """
+        开启规则统计（见 keyword_engine.profiling），返回 RuleStats
+
+        否定词、品牌词、规则树节点的判定函数和各原子的匹配函数换成带计时的包装，
+        uninstrument() 换回原函数；不开启时分类路径上没有额外开销。
+        """
+        from keyword_engine.profiling import RuleStats
+
+        self.uninstrument()
+        stats = stats if stats is not None else RuleStats()
+        # 替换记录：(容器, 键, 原值)，按相反顺序恢复
+        replaced = self._instrumented = []
+        atom_tokens = {}
+        for token, node in self.atoms.by_token.items():
+            atom_tokens.setdefault(node, token)
+        atom_names = {f'_a{i}': f'原子:{atom_tokens[node]}' for node, i in self.atoms.index.items()}
+        wrapped_atoms = {}
+
+        def wrap(name, container, key, match):
+            if match is None:
+                return
+            # 生成的判定函数内部按名字调用原子函数，替换其命名空间里的原子
+            if _condition_code(match) is not None:
+                namespace = match.__globals__
+                for atom in match.__code__.co_names:
+                    if atom in atom_names:
+                        if atom not in wrapped_atoms:
+                            wrapped_atoms[atom] = stats.wrap(atom_names[atom], namespace[atom])
+                        replaced.append((namespace, atom, namespace[atom]))
+                        namespace[atom] = wrapped_atoms[atom]
+            replaced.append((container, key, container[key]))
+            if isinstance(container, list):
+                entry = container[key]
+                container[key] = (entry[0], stats.wrap(name, match), entry[2])
+            else:
+                container[key] = stats.wrap(name, match)
+
+        for prefix, entries in (('否定词', self._negative_matchers), ('品牌词', self._brand_matchers)):
+            for i, (key, match, _) in enumerate(entries):
+                wrap(f'{prefix}-{key}', entries, i, match)
+        names = {-1: None}
+        for nid, (key, node) in self._tree.items():
+            parent = names[self._parent[nid]]
+            names[nid] = key if parent is None else f'{parent}-{key}'
+            wrap(names[nid], node, 'match', node['match'])
+        return stats
+
+    def uninstrument(self):
+        """关闭规则统计，恢复原判定函数"""
+        for container, key, original in reversed(self.__dict__.pop('_instrumented', [])):
+            container[key] = original
+
+    def __getstate__(self):
+        # 生成的函数不能 pickle：AST 照传，生成函数的代码对象用 marshal 序列化，
+        # 对端解释器版本一致时直接重建，否则从 AST 重新编译；前置索引原样传递
+        state = self.__dict__.copy()
+        codes = {}
+        for entries in (self._negative_matchers, self._brand_matchers):
+            for _, match, nid in entries:
+                codes[nid] = _condition_code(match)
+        for nid, (_, node) in self._tree.items():
+            codes[nid] = _condition_code(node['match'])
+        codes = {nid: code for nid, code in codes.items() if code is not None}
+        state['_codes'] = (sys.implementation.cache_tag, marshal.dumps(codes))
+        for name in ('_negative_matchers', '_brand_matchers', '_tree', '_parent', '_instrumented'):
+            state.pop(name, None)
+        state['root'] = _strip_matchers(self.root)
+        return state
+
+    def __setstate__(self, state):
+        tag, data = state.pop('_codes', (None, None))
+        self.__dict__.update(state)
+        self._compile(marshal.loads(data) if tag == sys.implementation.cache_tag else None)
+        if '_prefilter' not in state:
+            self._build_prefilter()
+    
+    def _process_negatives(self, config):
+        return [(k, self._parse_condition(c)) for k, c in config.items()]
+    
+    def _process_brands(self, config):
+        return [(k, self._parse_condition(c)) for k, c in config.items()]
+    
+    def _parse_condition(self, condition_str):
+        # 列表形式的多个条件按"或"合并
+        if isinstance(condition_str, (list, tuple)):
+            nodes = [self._parse_condition(c) for c in condition_str]
+            node = nodes[0]
+            for right in nodes[1:]:
+                node = OrNode(node, right)
+            return node
+        tokens = tokenize(condition_str)
+        parser = Parser(tokens, self.wildcard, self.case_sensitive, self.atoms)
+        node = parser.parse_expression()
+        if parser.peek() is not None:
+            raise SyntaxError(f"Unexpected token {parser.peek()!r} in {condition_str!r}")
+        return node
+    
+    def _build_classifier(self, config):
+        classifier = {}
+        for key in sorted(config.keys()):
+            value = config[key]
+            if isinstance(value, dict):
+                # 分组节点本身没有条件，由子节点决定是否命中
+                condition = None
+                children = self._build_classifier(value)
+            else:
+                condition = self._parse_condition(value)
+                children = {}
+            classifier[key] = {'condition': condition, 'children': children}
+        return classifier
+    
+    def classify(self, text):
+        text = self.normalize(text)
+        # 每个原子对这个关键词最多求值一次
+        memo = bytearray(len(self.atoms))
+        # 不含任何必需字面词的条件不可能命中，不必求值
+        candidates = self.candidates(text)
+        # Check negatives
+        for neg_key, match, nid in self._negative_matchers:
+            if nid in candidates and match(text, memo):
+                return f'否定词-{neg_key}'
+        # Check brands
+        for brand_key, match, nid in self._brand_matchers:
+            if nid in candidates and match(text, memo):
+                return f'品牌词-{brand_key}'
+        # Process root classifier
+        if not self.root:
+            return '其他'
+        # 由候选叶子向上补齐候选分组：{父节点编号: [候选子节点编号]}
+        children = {}
+        for nid in candidates:
+            while nid in self._parent:
+                parent = self._parent[nid]
+                siblings = children.get(parent)
+                if siblings is not None:
+                    # 父节点已登记过，其上级也已补齐
+                    siblings.append(nid)
+                    break
+                children[parent] = [nid]
+                nid = parent
+        best_path = None
+        max_count = -1
+        
+        stack = [(nid, [], 0) for nid in sorted(children.get(-1, ()))]
+        
+        while stack:
+            nid, path, count = stack.pop()
+            current_key, current_node = self._tree[nid]
+            current_match = current_node['match']
+            
+            if current_match is not None and not current_match(text, memo):
+                continue
+            
+            new_count = count + 1
+            new_path = path + [current_key]
+            
+            if not current_node['children']:
+                # 分组节点下没有叶子时不算命中
+                if current_match is None:
+                    continue
+                if (new_count > max_count) or (new_count == max_count and (best_path is None or new_path < best_path)):
+                    best_path = new_path
+                    max_count = new_count
+            else:
+                for child in sorted(children.get(nid, ())):
+                    stack.append((child, new_path, new_count))
+        
+        return '-'.join(best_path) if best_path else '其他'
+
+    def classify_batch(self, texts, workers=None, chunk_size=None, unique=True, pool=None):
+        """
+        批量分类，结果与输入顺序一致
+
+        workers 为 1 时在当前进程内顺序执行，否则使用进程池并行（见 keyword_engine.parallel）；
+        逐批调用时传入 pool（ClassifierPool(self, ...)）复用同一个进程池；
+        unique 为 True 时只对不同的归一化关键词分类，再按编号回填
+        """
+        from keyword_engine.dedup import classify_unique
+        from keyword_engine.parallel import DEFAULT_CHUNK_SIZE, classify_parallel
+
+        def classify_many(items):
+            return classify_parallel(self, items, workers=workers,
+                                     chunk_size=chunk_size or DEFAULT_CHUNK_SIZE, pool=pool)
+
+        if not unique:
+            return classify_many(texts)
+        return classify_unique(texts, classify_many, normalize=self.normalize)
+
+    def normalize(self, text):
+        return normalize_keyword(text, fold_case=not self.case_sensitive)
+
+class Parser:
+    def __init__(self, tokens, wildcard=None, case_sensitive=True, atoms=None):
+        self.tokens = tokens
+        self.pos = 0
+        self.wildcard = wildcard or {}
+        self.case_sensitive = case_sensitive
+        self.atoms = atoms
+        self._wildcard_sets = atoms.wildcards if atoms is not None else {}
+    
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+    
+    def consume(self):
+        self.pos += 1
+    
+    def parse_expression(self):
+        return self.parse_or_expression()
+    
+    def parse_or_expression(self):
+        node = self.parse_and_expression()
+        while self.peek() == '|':
+            self.consume()
+            right = self.parse_and_expression()
+            node = OrNode(node, right)
+        return node
+    
+    def parse_and_expression(self):
+        node = self.parse_unary_expression()
+        # a-b 等价于 a&-b
+        while self.peek() in ('&', '-'):
+            if self.peek() == '&':
+                self.consume()
+            right = self.parse_unary_expression()
+            node = AndNode(node, right)
+        return node
+    
+    def parse_unary_expression(self):
+        if self.peek() == '-':
+            self.consume()
+            expr = self.parse_primary_expression()
+            return NotNode(expr)
+        return self.parse_primary_expression()
+    
+    def parse_primary_expression(self):
+        token = self.peek()
+        if token is None:
+            raise SyntaxError("Unexpected end of input")
+        if token == '(':
+            self.consume()
+            expr = self.parse_expression()
+            if self.peek() != ')':
+                raise SyntaxError("Missing closing parenthesis")
+            self.consume()
+            return expr
+        else:
+            self.consume()
+            atom = self.parse_atom(token)
+            return atom
+    
+    def normalize(self, text):
+        return normalize_keyword(text, fold_case=not self.case_sensitive)
+
+    def wildcard_set(self, key):
+        """通配符字典对应的 WildcardSet（取值已归一化），同一原子表内只构建一次"""
+        wildcard_set = self._wildcard_sets.get(key)
+        if wildcard_set is None:
+            if key not in self.wildcard:
+                raise SyntaxError(f"No wildcards available for {{{key}}}")
+            # 空字典与原来展开出的空或选 (?:) 一样匹配空串
+            values = [self.normalize(v) for v in self.wildcard[key]] or ['']
+            wildcard_set = self._wildcard_sets[key] = WildcardSet(key, values)
+        return wildcard_set
+
+    def parse_atom(self, token):
+        if self.atoms is None:
+            return self._build_atom(token)
+        return self.atoms.intern(token, lambda: self._build_atom(token), lambda: self._atom_literals(token))
+
+    def _atom_literals(self, token):
+        """原子命中时关键词（归一化后）必然包含其中之一的字面词集合；无法确定时返回 None"""
+        if token.startswith('$##') and token.endswith('##$'):
+            return None
+        if len(token) >= 2 and token.startswith('^') and token.endswith('^'):
+            token = token[1:-1]
+        wildcards = list(re.finditer(r'\{(\w+)\}', token))
+        if not wildcards:
+            literal = self.normalize(token)
+            return frozenset([literal]) if literal else None
+        # 有字面部分时取最长的一段，否则取第一个通配符的全部取值
+        longest = max((self.normalize(seg) for seg in re.split(r'\{\w+\}', token)), key=len)
+        if longest:
+            return frozenset([longest])
+        wildcard_set = self.wildcard_set(wildcards[0].group(1))
+        return None if wildcard_set.has_empty else wildcard_set.values
+
+    def _build_atom(self, token):
+        flags = re.IGNORECASE if not self.case_sensitive else 0
+        if token.startswith('$##') and token.endswith('##$'):
+            regex_str = token[3:-3]
+            is_boundary = False
+            if len(regex_str) >= 2 and regex_str.startswith('^') and regex_str.endswith('$'):
+                is_boundary = True
+                regex_str = regex_str[1:-1]
+            regex = re.compile(regex_str, flags=flags)
+            return ComplexRegexNode(regex, is_boundary)
+        elif re.search(r'\{(\w+)\}', token):
+            is_boundary = False
+            if len(token) >= 2 and token.startswith('^') and token.endswith('^'):
+                is_boundary = True
+                token = token[1:-1]
+            # 字面段与共用的字典交替组成模式，不再把字典展开成或选正则
+            segments = []
+            pos = 0
+            for match in re.finditer(r'\{(\w+)\}', token):
+                if match.group(1) not in self.wildcard:
+                    raise SyntaxError(f"No wildcards available for {token}")
+                segments.append(self.normalize(token[pos:match.start()]))
+                segments.append(self.wildcard_set(match.group(1)))
+                pos = match.end()
+            segments.append(self.normalize(token[pos:]))
+            return WildcardNode((WildcardPattern(segments),), is_boundary)
+        elif len(token) >= 2 and token.startswith('^') and token.endswith('^'):
+            pattern = token[1:-1]
+            is_boundary = True
+            return ExactNode(re.compile(re.escape(self.normalize(pattern))), is_boundary)
+        else:
+            pattern = re.escape(self.normalize(token))
+            is_boundary = False
+            if token.startswith('^') and token.endswith('^'):
+                is_boundary = True
+                pattern = '^' + pattern + '$'
+            regex = re.compile(pattern)
+            return ExactNode(regex, is_boundary)
+
+def tokenize(s):
+    # tokens = []
+    # pattern = r'([-&|()])|([^\\s-&|()]+)'
+    # for match in re.finditer(pattern, s):
+    #     if match.group(1):
+    #         tokens.append(match.group(1))
+    #     else:
+    #         token = match.group(2).strip()
+    #         if token:
+    #             tokens.append(token)
+    # return tokens
+    complex_regex_pattern = r'\$##(.*?)##\$'
+    token_pattern = re.compile(r"""
+        ([-&|()]) |                   # 操作符
+        (\$\#\#.*?\#\#\$) |           # 复杂正则（非贪婪匹配，VERBOSE 下 # 需转义）
+        ([^\s\-&|()]+)               # 其他内容（排除空白、-、&、|、()）
+    """, re.VERBOSE)
+    
+    tokens = []
+    pos = 0
+    while pos < len(s):
+        match = token_pattern.match(s, pos)
+        if not match:
+            # 跳过空格或非法字符
+            if s[pos] == ' ':
+                pos += 1
+            else:
+                raise SyntaxError(f"Unexpected character: '{s[pos]}' at position {pos}")
+            continue
+        
+        operator, complex_regex, text = match.groups()
+        
+        if complex_regex is not None:
+            tokens.append(complex_regex.strip())
+            pos = match.end()
+        elif operator is not None:
+            tokens.append(operator)
+            pos += 1
+        elif text is not None:
+            tokens.append(text.strip())
+            pos += len(text)
+    
+    return tokens
+
+def _strip_matchers(tree):
+    return {
+        key: {'condition': node['condition'], 'children': _strip_matchers(node['children'])}
+        for key, node in tree.items()
+    }
+
+def required_literals(node, literals, frequency=None):
+    """
+    条件成立时关键词必然包含其中之一的字面词集合；无法确定时返回 None
+
+    literals 为 {原子节点: 字面词集合}。与取任一侧，或取两侧并集，非无法确定（不含某词也可能成立）。
+    与的各侧中优先取字面词在整个配置里出现次数（frequency）之和最小的一侧，候选节点最少。
+    """
+    if isinstance(node, (ExactNode, WildcardNode, ComplexRegexNode)):
+        return literals.get(node)
+    elif isinstance(node, NotNode):
+        return None
+    elif isinstance(node, AndNode):
+        sides = [r for r in (required_literals(n, literals, frequency) for n in _flatten(node, AndNode)) if r is not None]
+        if not sides:
+            return None
+        if frequency is None:
+            return min(sides, key=len)
+        return min(sides, key=lambda r: sum(frequency.get(lit, 0) for lit in r))
+    elif isinstance(node, OrNode):
+        union = set()
+        for n in _flatten(node, OrNode):
+            required = required_literals(n, literals, frequency)
+            if required is None:
+                return None
+            union |= required
+        return frozenset(union)
+    else:
+        raise TypeError(f"Unknown node type: {type(node)}")
+
+def _iter_atoms(node):
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, (AndNode, OrNode)):
+            stack.extend((current.left, current.right))
+        elif isinstance(current, NotNode):
+            stack.append(current.child)
+        else:
+            yield current
+
+def _flatten(node, node_type):
+    """把连续的同类 And/Or 节点展开成从左到右的操作数列表"""
+    operands = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, node_type):
+            stack.append(current.right)
+            stack.append(current.left)
+        else:
+            operands.append(current)
+    return operands
+
+def _atom_matchers(node):
+    """原子节点对应的匹配方法列表（通配符节点可能有多个）"""
+    if isinstance(node, ExactNode):
+        patterns = [node.pattern]
+    elif isinstance(node, WildcardNode):
+        patterns = node.patterns
+    else:
+        patterns = [node.regex]
+    return [p.fullmatch if node.is_boundary else p.search for p in patterns]
+
+def _emit(node, namespace, atom_index=None):
+    """
+    生成条件表达式的 Python 源码，原子匹配方法绑定到 namespace 中的名字
+
+    给定 atom_index 时，原子结果记在每个关键词的 memo 里（0 未求值、1 未命中、2 命中），
+    同一个原子在整棵规则树中只匹配一次
+    """
+    if isinstance(node, (ExactNode, WildcardNode, ComplexRegexNode)):
+        if atom_index is not None:
+            i = atom_index[node]
+            name = f'_a{i}'
+            namespace[name] = _memo_atom(i, _atom_matchers(node))
+            return f'(memo[{i}] == 2 if memo[{i}] else {name}(text, memo))'
+        calls = []
+        for matcher in _atom_matchers(node):
+            name = f'_m{len(namespace)}'
+            namespace[name] = matcher
+            calls.append(f'{name}(text)')
+        return calls[0] if len(calls) == 1 else '(' + ' or '.join(calls) + ')'
+    elif isinstance(node, NotNode):
+        return f'(not {_emit(node.child, namespace, atom_index)})'
+    elif isinstance(node, AndNode):
+        return '(' + ' and '.join(_emit(n, namespace, atom_index) for n in _flatten(node, AndNode)) + ')'
+    elif isinstance(node, OrNode):
+        return '(' + ' or '.join(_emit(n, namespace, atom_index) for n in _flatten(node, OrNode)) + ')'
+    else:
+        raise TypeError(f"Unknown node type: {type(node)}")
+
+def _memo_atom(index, matchers):
+    """原子求值并把结果写进 memo[index]"""
+    def check(text, memo):
+        hit = any(m(text) for m in matchers)
+        memo[index] = 2 if hit else 1
+        return hit
+    return check
+
+def _compile_closure(node, atom_index=None):
+    """嵌套闭包版本，生成源码嵌套过深无法编译时使用"""
+    if isinstance(node, (ExactNode, WildcardNode, ComplexRegexNode)):
+        matchers = _atom_matchers(node)
+        if atom_index is not None:
+            i = atom_index[node]
+            check = _memo_atom(i, matchers)
+            return lambda text, memo: memo[i] == 2 if memo[i] else check(text, memo)
+        if len(matchers) == 1:
+            return matchers[0]
+        return lambda text: any(m(text) for m in matchers)
+    elif isinstance(node, NotNode):
+        child = _compile_closure(node.child, atom_index)
+        return lambda *args: not child(*args)
+    elif isinstance(node, AndNode):
+        parts = [_compile_closure(n, atom_index) for n in _flatten(node, AndNode)]
+        return lambda *args: all(p(*args) for p in parts)
+    elif isinstance(node, OrNode):
+        parts = [_compile_closure(n, atom_index) for n in _flatten(node, OrNode)]
+        return lambda *args: any(p(*args) for p in parts)
+    else:
+        raise TypeError(f"Unknown node type: {type(node)}")
+
+def compile_condition(node, atom_index=None):
+    """
+    把条件AST编译成一个判定函数
+
+    整棵条件树生成为一条带短路求值的 Python 表达式，正则匹配方法作为局部名字绑定，
+    求值时没有逐节点的类型分派和递归调用；与 evaluate() 的结果一致。
+    不给 atom_index 时返回 f(text)；给出 {原子节点: 编号} 时返回 f(text, memo)，
+    memo 为每个关键词新建的 bytearray(原子数)，在多个条件之间共享。
+    """
+    namespace = {}
+    args = 'text' if atom_index is None else 'text, memo'
+    try:
+        source = f'lambda {args}: bool({_emit(node, namespace, atom_index)})'
+        return eval(compile(source, '<condition>', 'eval'), namespace)
+    except (RecursionError, SyntaxError, MemoryError):
+        return _compile_closure(node, atom_index)
+
+def _condition_code(func):
+    """compile_condition 生成的函数的代码对象（闭包版本返回 None）"""
+    func = getattr(func, '__wrapped__', func)
+    code = getattr(func, '__code__', None)
+    return code if code is not None and code.co_filename == '<condition>' else None
+
+def _load_condition(code, atom_nodes, bound=None):
+    """
+    由生成函数的代码对象重建判定函数，按名字 _a{编号} 重新绑定原子匹配方法
+
+    bound 为 {名字: 原子匹配函数}，在多个条件之间共享，每个原子只构造一次
+    """
+    bound = {} if bound is None else bound
+    namespace = {'__builtins__': builtins}
+    for name in code.co_names:
+        if name.startswith('_a'):
+            check = bound.get(name)
+            if check is None:
+                i = int(name[2:])
+                check = bound[name] = _memo_atom(i, _atom_matchers(atom_nodes[i]))
+            namespace[name] = check
+    return types.FunctionType(code, namespace)
+
+# AST Node Evaluation Methods
+def evaluate(node, text, case_sensitive):
+    if isinstance(node, ExactNode):
+        return node.pattern.fullmatch(text) if node.is_boundary else node.pattern.search(text)
+    elif isinstance(node, WildcardNode):
+        for pattern in node.patterns:
+            if node.is_boundary:
+                if pattern.fullmatch(text):
+                    return True
+            else:
+                if pattern.search(text):
+                    return True
+        return False
+    elif isinstance(node, ComplexRegexNode):
+        return node.regex.fullmatch(text) if node.is_boundary else node.regex.search(text)
+    elif isinstance(node, NotNode):
+        return not evaluate(node.child, text, case_sensitive)
+    elif isinstance(node, AndNode):
+        return evaluate(node.left, text, case_sensitive) and evaluate(node.right, text, case_sensitive)
+    elif isinstance(node, OrNode):
+        return evaluate(node.left, text, case_sensitive) or evaluate(node.right, text, case_sensitive)
+    else:
+        raise TypeError(f"Unknown node type: {type(node)}")
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+分类结果输出
+
+DataFrame.to_excel / openpyxl 逐格写 xlsx 是落盘最慢的方式。分类流水线改为把结果按批
+追加写入列式/行式文件，xlsx 只在需要给人看时由结果文件转换出来：
+
+- CsvSink     - CSV（带 BOM，Excel 直接打开不乱码）
+- JsonlSink   - 每行一个 JSON 对象
+- ParquetSink - Parquet（需要安装 pyarrow），按行组追加
+- XlsxSink    - 只写模式工作簿，兼容原来直接写 xlsx 的用法
+
+写出时先写到同目录的临时文件，正常关闭后才替换目标文件：中途失败不会留下半个结果文件，
+变更清单也就不会把它当成已完成的输出。
+
+    with open_sink("./result/软件开发.csv", ["关键词", "成交意向", "词性分类"]) as sink:
+        for keywords, labels in batches:
+            sink.write_rows((kw, *label) for kw, label in zip(keywords, labels))
+
+按行读取的输入（excel_io.iter_row_batches）用 write_row_batches 连同原表其他列一起写出。
+
+转换成 xlsx（在仓库根目录执行）：
+    PYTHONPATH=src python -m keyword_engine.sinks export ./result/软件开发.csv
+    PYTHONPATH=src python -m keyword_engine.sinks export ./result/品牌词_分组结果.csv --group-column 分组
+"""
+import csv
+import json
+import os
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Type
+
+DEFAULT_FORMAT = "csv"
+# Parquet 每个行组的行数：太小压缩差、读起来慢，太大占内存
+PARQUET_ROW_GROUP_SIZE = 100000
+# 转换成 xlsx 时每批读取的行数
+EXPORT_BATCH_SIZE = 10000
+
+
+class Sink:
+    """
+    按批追加写出的结果文件
+
+    参数：
+    path    - 输出路径
+    columns - 列名（表头）
+
+    可作为上下文管理器使用：正常退出时提交，异常退出时丢弃临时文件。
+    """
+    format = ""
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        self.path = path
+        self.columns = list(columns)
+        self.rows = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 同目录下按进程号和写出对象区分的临时文件：并发写同一个输出时互不覆盖
+        self._tmp_path = f"{path}.{os.getpid()}.{id(self):x}.tmp"
+        self._closed = False
+        self._open(self._tmp_path)
+
+    def _open(self, path: str) -> None:
+        raise NotImplementedError
+
+    def _write(self, rows: list) -> None:
+        raise NotImplementedError
+
+    def _finish(self) -> None:
+        raise NotImplementedError
+
+    def write_rows(self, rows: Iterable[Sequence]) -> int:
+        """追加一批行（每行与 columns 等长），返回本批行数"""
+        rows = rows if isinstance(rows, list) else list(rows)
+        if rows:
+            self._write(rows)
+            self.rows += len(rows)
+        return len(rows)
+
+    def write_frame(self, frame) -> int:
+        """追加一个 DataFrame（列顺序应与 columns 一致）"""
+        return self.write_rows(list(frame.itertuples(index=False, name=None)))
+
+    def close(self) -> None:
+        """写完并替换目标文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._finish()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        """放弃写出，删除临时文件"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._finish()
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class CsvSink(Sink):
+    format = "csv"
+
+    def _open(self, path: str) -> None:
+        # 带 BOM，Excel 直接打开不乱码
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def _write(self, rows: list) -> None:
+        self._writer.writerows(rows)
+
+    def _finish(self) -> None:
+        self._file.close()
+
+
+class JsonlSink(Sink):
+    format = "jsonl"
+
+    def _open(self, path: str) -> None:
+        self._file = open(path, "w", encoding="utf-8")
+
+    def _write(self, rows: list) -> None:
+        columns = self.columns
+        self._file.write("".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n" for row in rows
+        ))
+
+    def _finish(self) -> None:
+        self._file.close()
+
+
+class ParquetSink(Sink):
+    """
+    Parquet 输出，攒够 row_group_size 行写一个行组
+
+    列类型由第一个行组推断，之后的行组按同一 schema 转换。
+    """
+    format = "parquet"
+
+    def __init__(self, path: str, columns: Sequence[str], row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+        self.row_group_size = row_group_size
+        super().__init__(path, columns)
+
+    def _open(self, path: str) -> None:
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ImportError("写 Parquet 需要安装 pyarrow：pip install pyarrow") from None
+        self._open_path = path
+        self._writer = None
+        self._buffer = []
+
+    def _write(self, rows: list) -> None:
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._buffer and self._writer is not None:
+            return
+        data = {column: [row[i] for row in self._buffer] for i, column in enumerate(self.columns)}
+        if self._writer is None:
+            # 空文件也写出只有 schema 的 Parquet；没有数据时各列按字符串处理
+            table = pa.table(data) if self._buffer else pa.table(
+                {column: pa.array([], pa.string()) for column in self.columns}
+            )
+            self._writer = pq.ParquetWriter(self._open_path, table.schema)
+        else:
+            table = pa.table(data).cast(self._writer.schema)
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def _finish(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+class XlsxSink(Sink):
+    """只写模式工作簿（单个工作表）；只在确实需要直接产出 xlsx 时使用"""
+    format = "xlsx"
+
+    def __init__(self, path: str, columns: Sequence[str], sheet_name: str = "Sheet1"):
+        self.sheet_name = sheet_name
+        super().__init__(path, columns)
+
+    def _open(self, path: str) -> None:
+        from openpyxl import Workbook
+
+        self._open_path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(self.sheet_name)
+        self._sheet.append(self.columns)
+
+    def _write(self, rows: list) -> None:
+        for row in rows:
+            self._sheet.append(row)
+
+    def _finish(self) -> None:
+        self._workbook.save(self._open_path)
+
+
+# 格式名（即扩展名） -> 输出类
+SINKS: Dict[str, Type[Sink]] = {sink.format: sink for sink in (CsvSink, JsonlSink, ParquetSink, XlsxSink)}
+# 流水线结果文件可选的格式（xlsx 由 export_xlsx 另行导出）
+RESULT_FORMATS = ("csv", "jsonl", "parquet")
+
+
+def format_of(path: str) -> str:
+    """按扩展名判断格式"""
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in SINKS:
+        raise ValueError(f"unsupported output format {fmt!r}, expected one of: {', '.join(SINKS)}")
+    return fmt
+
+
+def open_sink(path: str, columns: Sequence[str], fmt: Optional[str] = None, **options) -> Sink:
+    """按扩展名（或 fmt）打开对应格式的输出"""
+    fmt = fmt or format_of(path)
+    sink = SINKS.get(fmt)
+    if sink is None:
+        raise ValueError(f"unsupported output format {fmt!r}, expected one of: {', '.join(SINKS)}")
+    return sink(path, columns, **options)
+
+
+def write_batches(path: str, columns: Sequence[str], batches: Iterable[Iterable[Sequence]],
+                  fmt: Optional[str] = None) -> int:
+    """把逐批产生的行依次追加写出，返回总行数；可直接作为 ChangeManifest.update_file 的 write"""
+    with open_sink(path, columns, fmt) as sink:
+        for rows in batches:
+            sink.write_rows(rows)
+    return sink.rows
+
+
+def write_row_batches(path: str, header: Sequence, result_columns: Sequence[str],
+                      batches: Iterable[tuple], fmt: Optional[str] = None) -> int:
+    """
+    连同原表各列写出分类结果：输出列为原表列 + 结果列，行顺序与原表一致
+
+    batches 产出 ([KeywordRow, ...], [结果行, ...])（见 excel_io.iter_row_batches），结果行与 result_columns 等长；
+    可直接作为 ChangeManifest.update_file 的 write
+    """
+    from keyword_engine.excel_io import merge_header
+
+    columns, keep = merge_header(header, result_columns)
+    return write_batches(path, columns, (
+        [row.pick(keep) + list(result) for row, result in zip(rows, results)] for rows, results in batches
+    ), fmt)
+
+
+def iter_frames(path: str, batch_size: int = EXPORT_BATCH_SIZE, fmt: Optional[str] = None) -> Iterator:
+    """
+    按批读回结果文件，产出 DataFrame
+
+    所有格式都按原样读回字符串：CSV / JSONL 不把 "NA"、"null" 之类的关键词当成空值。
+    """
+    import pandas as pd
+
+    fmt = fmt or format_of(path)
+    if fmt == "csv":
+        yield from pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False, chunksize=batch_size)
+    elif fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            batch = []
+            for line in f:
+                if line.strip():
+                    batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield pd.DataFrame(batch)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield record_batch.to_pandas()
+    else:
+        raise ValueError(f"cannot read {fmt!r} results, expected one of: csv, jsonl, parquet")
+
+
+def export_xlsx(source: str, output: Optional[str] = None, group_column: Optional[str] = None,
+                batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    把结果文件转换成 xlsx（只写模式，边读边写）
+
+    参数：
+    source       - CSV / JSONL / Parquet 结果文件
+    output       - xlsx 路径（默认与 source 同名）
+    group_column - 给出时按该列分组写入各工作表，否则依次写入"Sheet1"（写满后续写"Sheet1_2"……）
+
+    返回：写入的行数；分组时为 {分组: 行数}
+    """
+    from keyword_engine.excel_io import write_frames_xlsx, write_grouped_xlsx
+
+    output = output or os.path.splitext(source)[0] + ".xlsx"
+    frames = iter_frames(source, batch_size)
+    if group_column:
+        return write_grouped_xlsx(output, frames, group_column=group_column)
+    return write_frames_xlsx(output, frames)
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m keyword_engine.sinks", description="分类结果输出")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="把 CSV / JSONL / Parquet 结果文件转换成 xlsx")
+    export.add_argument("sources", nargs="+", help="结果文件")
+    export.add_argument("-o", "--output", help="xlsx 路径（只有一个结果文件时可用，默认与结果文件同名）")
+    export.add_argument("--group-column", help="按该列分组写入各工作表")
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.sources) > 1:
+        parser.error("--output 只能用于单个结果文件")
+    for source in args.sources:
+        result = export_xlsx(source, args.output, args.group_column)
+        rows = sum(result.values()) if isinstance(result, dict) else result
+        print(f"{source} -> {args.output or os.path.splitext(source)[0] + '.xlsx'}：{rows} 行")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
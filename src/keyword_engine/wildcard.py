@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+{通配符} 字典与通配符模式
+
+规则里的 {地址}、{城市}培训 这类写法原来展开成 re.escape 后的大或选正则（或全部字面组合），
+字典有几千上万个取值时，每个引用它的原子都各自编译一份，匹配也随取值数变慢。
+
+WildcardSet 按字典构建一次：取值集合 + 一个自动机（同时当前缀树用），配置里所有引用
+这个字典的规则共用。WildcardPattern 是字面段与字典交替组成的模式，提供与 re.Pattern
+相同的 search / fullmatch（只关心是否命中），匹配代价与关键词长度有关，与字典大小无关。
+"""
+from typing import Iterable, Iterator, Set, Tuple, Union
+
+from keyword_engine.automaton import AhoCorasick
+
+
+class WildcardSet:
+    """
+    一个通配符字典（取值应已归一化）
+
+    参数：
+    name   - 字典名（只用于显示）
+    values - 取值
+    """
+
+    def __init__(self, name: str, values: Iterable[str]):
+        self.name = name
+        self.values = frozenset(values)
+        # 空取值可以匹配空串，与正则 (?:|...) 的行为一致
+        self.has_empty = "" in self.values
+        # 附带数据为取值长度：扫描时由结尾位置倒推起点
+        self._automaton = AhoCorasick(((value, len(value)) for value in self.values if value), ignore_case=False)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __eq__(self, other) -> bool:
+        # 取值相同即相等（与同一或选正则相等一致），新旧规则集比较时不会把通配符原子都算作改动
+        return self is other or (isinstance(other, WildcardSet) and self.values == other.values)
+
+    def __hash__(self) -> int:
+        return hash(self.values)
+
+    def __repr__(self) -> str:
+        return f"WildcardSet({self.name!r}, {len(self.values)} values)"
+
+    def occurs_in(self, text: str) -> bool:
+        """text 中是否出现任一取值"""
+        return self.has_empty or next(self._automaton.iter_hits(text), None) is not None
+
+    def occurrences(self, text: str) -> Iterator[Tuple[int, int]]:
+        """text 中各取值出现的 (起点, 终点)，按终点排列（不含空取值）"""
+        for end, length in self._automaton.iter_hits(text):
+            yield end + 1 - length, end + 1
+
+    def ends_at(self, text: str, pos: int) -> Set[int]:
+        """从 pos 开始的取值可能的终点"""
+        ends = {end + 1 for end, _ in self._automaton.iter_prefixes(text, pos)}
+        if self.has_empty:
+            ends.add(pos)
+        return ends
+
+
+class WildcardPattern:
+    """
+    字面段与 WildcardSet 交替组成的模式，如 {城市}培训 -> (WildcardSet(城市), "培训")
+
+    search / fullmatch 与把字典展开成或选正则后的结果一致，只返回是否命中；
+    字面段相同、引用的字典取值相同的两个模式视为相等（原子表据此去重）。
+    """
+
+    def __init__(self, segments: Iterable[Union[str, WildcardSet]]):
+        merged = []
+        for segment in segments:
+            if isinstance(segment, str):
+                if not segment:
+                    continue
+                if merged and isinstance(merged[-1], str):
+                    merged[-1] += segment
+                    continue
+            merged.append(segment)
+        self.segments = tuple(merged)
+        self.pattern = "".join(s if isinstance(s, str) else "{" + s.name + "}" for s in self.segments)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, WildcardPattern) and self.segments == other.segments
+
+    def __hash__(self) -> int:
+        return hash(self.segments)
+
+    def __repr__(self) -> str:
+        return f"WildcardPattern({self.pattern!r})"
+
+    def _advance(self, text: str, positions: Set[int], segments) -> Set[int]:
+        """从一组起点依次匹配各段，返回能到达的终点"""
+        for segment in segments:
+            if not positions:
+                break
+            if isinstance(segment, str):
+                positions = {p + len(segment) for p in positions if text.startswith(segment, p)}
+            else:
+                positions = set().union(*(segment.ends_at(text, p) for p in positions))
+        return positions
+
+    def search(self, text: str) -> bool:
+        if not self.segments:
+            return True
+        first, rest = self.segments[0], self.segments[1:]
+        if isinstance(first, str):
+            ends = set()
+            start = text.find(first)
+            while start != -1:
+                ends.add(start + len(first))
+                start = text.find(first, start + 1)
+        elif not rest:
+            return first.occurs_in(text)
+        elif first.has_empty:
+            ends = set(range(len(text) + 1))
+        else:
+            ends = {end for _, end in first.occurrences(text)}
+        return bool(self._advance(text, ends, rest))
+
+    def fullmatch(self, text: str) -> bool:
+        if len(self.segments) == 1 and not isinstance(self.segments[0], str):
+            return text in self.segments[0].values
+        return len(text) in self._advance(text, {0}, self.segments)
@@ -1,101 +1,196 @@
 import re
 from collections import defaultdict
+
+from keyword_engine.automaton import AhoCorasick
+from keyword_engine.dedup import classify_unique
+from keyword_engine.normalize import normalize_keyword
+from keyword_engine.wildcard import WildcardPattern, WildcardSet
+
+# 表达式词法：括号、运算符、^边界词^、其余连续文本为操作数（可含 {通配符}）
+_EXPR_TOKEN = re.compile(r'\(|\)|&|\||-|\^[^^]*\^|[^()&|\-^]+')
+_WILDCARD = re.compile(r'\{([^}]+)\}')
+# 运算符优先级；二元 "-" 表示"且非"，与 & 同级，一元 "-" 表示"非"
+_PRECEDENCE = {'OR': 1, 'AND': 2, 'ANDNOT': 2, 'NOT': 3}
+
+
 class Tokenizer:
+    """
+    规则分词器
+
+    每条规则编译成逆波兰形式的布尔程序，操作数是原子编号。所有字面词
+    （含每个通配符字典的取值，每个字典只装一次）装进同一个 Aho-Corasick 自动机，
+    关键词扫描一遍得到命中的原子集合，再逐条执行布尔程序。{城市}培训 这类
+    带字面段或多个通配符的操作数不再展开成全部组合，而是由共用字典的
+    WildcardPattern 匹配，且只在所引用的字典都有取值命中时才匹配。
+    单个关键词的代价与文本长度加规则总长度成正比，与字典大小无关。
+    """
     def __init__(self, config_dict, wildcard_dict, case_sensitive=False):
         self.config = config_dict
         self.wildcards = wildcard_dict
         self.case_sensitive = case_sensitive
         self.compiled_rules = []
+        # 原子表：操作数文本 -> 编号
+        self._atoms = {}
+        self._literals = []      # (字面词, 原子编号)
+        self._exact = defaultdict(list)   # ^边界词^：整个关键词 -> [原子编号]
+        self._regex_atoms = []   # (原子编号, 编译后的正则)
+        self._pattern_atoms = []  # (原子编号, 通配符模式的匹配方法, 需先命中的字典原子)
+        self._wildcard_sets = {}  # 通配符名 -> WildcardSet（取值已归一化）
         self._compile_rules(config_dict)
+        self._automaton = AhoCorasick(self._literals, ignore_case=False)
+    def _normalize(self, text):
+        return normalize_keyword(text, fold_case=not self.case_sensitive)
     def _compile_rules(self, current_dict, path=[]):
         for key, value in current_dict.items():
             current_path = path + [key]
             if isinstance(value, dict):
                 self._compile_rules(value, current_path)
             else:
-                pattern = self._parse_expression(value)
                 self.compiled_rules.append({
                     'path': current_path,
-                    'pattern': pattern,
-                    'exclude': self._parse_exclusion(value)
+                    'program': self._parse_expression(value)
                 })
     def _parse_expression(self, expr):
-        # 处理通配符
-        expr = re.sub(r'\{([^}]+)\}', self._replace_wildcard, expr)
-        
-        # 处理边界匹配
-        expr = re.sub(r'\^([^^]+)\^', r'^\1$', expr)
-        
-        # 转换逻辑操作符
-        expr = re.sub(r'&', ' AND ', expr)
-        expr = re.sub(r'\|', ' OR ', expr)
-        expr = re.sub(r'-', ' NOT ', expr)
-        
-        # 添加括号优先级处理
-        return self._build_regex(expr)
-    def _build_regex(self, expr):
-        # 使用逆波兰表达式处理操作符优先级
-        precedence = {'(': 0, ')': 0, 'NOT': 3, 'AND': 2, 'OR': 1}
+        """把规则表达式编译成布尔程序（逆波兰序列，整数为原子编号）"""
+        return self._build_program(_EXPR_TOKEN.findall(expr), expr)
+    def _build_program(self, tokens, expr):
+        # 调度场算法转逆波兰表达式
         output = []
         stack = []
-        
-        for token in re.findall(r'$|$|\w+|\S', expr):
+        expect_operand = True
+        for token in tokens:
+            if not token.strip():
+                continue
             if token == '(':
                 stack.append(token)
+                expect_operand = True
             elif token == ')':
-                while stack[-1] != '(':
-                    output.append(stack.pop())
+                while stack and stack[-1] != '(':
+                    output.extend(self._emit(stack.pop()))
+                if not stack:
+                    raise ValueError(f"Unbalanced parenthesis in {expr!r}")
                 stack.pop()
-            elif token in precedence:
-                while stack and precedence[stack[-1]] >= precedence[token]:
-                    output.append(stack.pop())
-                stack.append(token)
+                expect_operand = False
+            elif token in '&|-':
+                if token == '-' and expect_operand:
+                    # 一元"非"右结合，不弹出同级运算符
+                    stack.append('NOT')
+                    continue
+                if expect_operand:
+                    raise ValueError(f"Missing operand before {token!r} in {expr!r}")
+                op = {'&': 'AND', '|': 'OR', '-': 'ANDNOT'}[token]
+                while stack and stack[-1] != '(' and _PRECEDENCE[stack[-1]] >= _PRECEDENCE[op]:
+                    output.extend(self._emit(stack.pop()))
+                stack.append(op)
+                expect_operand = True
             else:
-                output.append(token)
-        
+                output.append(self._operand(token.strip()))
+                expect_operand = False
         while stack:
-            output.append(stack.pop())
-        
-        return self._evaluate_rpn(output)
-    def _evaluate_rpn(self, rpn_tokens):
-        """逆波兰表达式求值核心算法"""
+            op = stack.pop()
+            if op == '(':
+                raise ValueError(f"Unbalanced parenthesis in {expr!r}")
+            output.extend(self._emit(op))
+        if expect_operand or not self._is_valid(output):
+            raise ValueError(f"Invalid RPN expression,{expr!r}")
+        return tuple(output)
+    @staticmethod
+    def _emit(op):
+        # 且非：先对右操作数取反再求且
+        return ('NOT', 'AND') if op == 'ANDNOT' else (op,)
+    @staticmethod
+    def _is_valid(program):
+        depth = 0
+        for op in program:
+            if op == 'NOT':
+                if depth < 1:
+                    return False
+            elif op in ('AND', 'OR'):
+                if depth < 2:
+                    return False
+                depth -= 1
+            else:
+                depth += 1
+        return depth == 1
+    def _operand(self, token):
+        """登记操作数对应的原子，返回原子编号"""
+        boundary = len(token) > 1 and token[0] == token[-1] == '^'
+        key = ('exact' if boundary else 'literal', token)
+        atom = self._atoms.get(key)
+        if atom is not None:
+            return atom
+        body = token[1:-1] if boundary else token
+        parts = _WILDCARD.split(body)
+        if len(parts) == 1:
+            atom = self._atoms[key] = len(self._atoms)
+            term = self._normalize(body)
+            if boundary:
+                self._exact[term].append(atom)
+            elif term:
+                self._literals.append((term, atom))
+            return atom
+        # split 后奇数位是通配符名
+        pattern = WildcardPattern(
+            self._wildcard_set(part) if i % 2 else self._normalize(part)
+            for i, part in enumerate(parts)
+        )
+        if not boundary and len(pattern.segments) == 1:
+            # 单独的 {通配符}：就是字典原子本身
+            atom = self._atoms[key] = self._dictionary_atom(parts[1])
+            return atom
+        atom = self._atoms[key] = len(self._atoms)
+        gates = tuple(
+            self._dictionary_atom(segment.name) for segment in pattern.segments
+            if isinstance(segment, WildcardSet) and not segment.has_empty
+        )
+        self._pattern_atoms.append((atom, pattern.fullmatch if boundary else pattern.search, gates))
+        return atom
+    def _wildcard_set(self, key):
+        """通配符字典（取值已归一化），每个字典只构建一次；未定义的字典没有取值"""
+        wildcard_set = self._wildcard_sets.get(key)
+        if wildcard_set is None:
+            values = [self._normalize(v) for v in self.wildcards.get(key, [])]
+            wildcard_set = self._wildcard_sets[key] = WildcardSet(key, values)
+        return wildcard_set
+    def _dictionary_atom(self, key):
+        """出现任一字典取值即命中的原子；字典取值只装进自动机一次"""
+        atom_key = ('literal', '{' + key + '}')
+        atom = self._atoms.get(atom_key)
+        if atom is None:
+            atom = self._atoms[atom_key] = len(self._atoms)
+            self._literals.extend((value, atom) for value in self._wildcard_set(key).values if value)
+        return atom
+    def _hits(self, text):
+        """扫描一遍关键词（已归一化），返回命中的原子编号集合"""
+        hits = self._automaton.payloads(text)
+        hits.update(self._exact.get(text, ()))
+        for atom, regex in self._regex_atoms:
+            if regex.search(text):
+                hits.add(atom)
+        for atom, match, gates in self._pattern_atoms:
+            if hits.issuperset(gates) and match(text):
+                hits.add(atom)
+        return hits
+    @staticmethod
+    def _run(program, hits):
+        """在命中集合上执行布尔程序"""
         stack = []
-        
-        for token in rpn_tokens:
-            if token in {'AND', 'OR', 'NOT'}:
-                # 处理二元操作符
-                if token == 'NOT':
-                    operand = stack.pop()
-                    stack.append(f'(?!.*{operand})')
-                else:
-                    right = stack.pop()
-                    left = stack.pop()
-                    if token == 'AND':
-                        # 使用顺序无关的肯定顺序断言
-                        stack.append(f'(?=.*{left})(?=.*{right})')
-                    elif token == 'OR':
-                        stack.append(f'({left}|{right})')
+        for op in program:
+            if op == 'AND':
+                right = stack.pop()
+                stack[-1] = stack[-1] and right
+            elif op == 'OR':
+                right = stack.pop()
+                stack[-1] = stack[-1] or right
+            elif op == 'NOT':
+                stack[-1] = not stack[-1]
             else:
-                # 处理基础token
-                stack.append(f'({token})')
-        
-        # 合并最终结果
-        if len(stack) != 1:
-            raise ValueError(f"Invalid RPN expression,{stack}")
-        
-        # 添加边界匹配检测
-        return f'^{stack[0]}.*$' if '^' not in stack[0] else stack[0]
-    def _replace_wildcard(self, match):
-        key = match.group(1)
-        values = self.wildcards.get(key, [])
-        return '(' + '|'.join(re.escape(v) for v in values) + ')'
+                stack.append(op in hits)
+        return stack[0]
     def tokenize(self, text):
-        matches = []
-        for rule in self.compiled_rules:
-            flags = 0 if self.case_sensitive else re.IGNORECASE
-            if re.search(rule['pattern'], text, flags=flags):
-                if not self._check_exclusion(rule['exclude'], text):
-                    matches.append(rule['path'])
+        text = self._normalize(text)
+        hits = self._hits(text)
+        matches = [rule['path'] for rule in self.compiled_rules if self._run(rule['program'], hits)]
         
         # 统计层级匹配次数
         counter = defaultdict(int)
@@ -113,12 +208,75 @@ class Tokenizer:
         # 按字典顺序排序
         sorted_candidates = sorted(candidates, key=lambda x: (len(x), x))
         return '-'.join(sorted_candidates[-1])
-    def _check_exclusion(self, exclude_patterns, text):
-        flags = 0 if self.case_sensitive else re.IGNORECASE
-        for pattern in exclude_patterns:
-            if re.search(pattern, text, flags=flags):
-                return True
-        return False
+    def instrument(self, stats=None):
+        """
+        开启规则统计（见 keyword_engine.profiling），返回 RuleStats
+
+        记录每条规则布尔程序、字面词扫描、每个自定义正则和通配符模式的耗时，以及每个原子的命中次数；
+        通过实例属性覆盖 _run/_hits 实现，uninstrument() 删除覆盖即恢复，不开启时没有额外开销。
+        """
+        from keyword_engine.profiling import RuleStats
+
+        self.uninstrument()
+        stats = stats if stats is not None else RuleStats()
+        run = Tokenizer._run
+        rule_runs = {}
+        seen = defaultdict(int)
+        for rule in self.compiled_rules:
+            name = '-'.join(rule['path'])
+            seen[name] += 1
+            if seen[name] > 1:
+                name = f'{name}#{seen[name]}'
+            rule_runs[id(rule['program'])] = stats.wrap(name, run)
+        scan = stats.wrap('扫描:字面词', self._automaton.payloads)
+        regex_atoms = [
+            (atom, stats.wrap(f"正则:{' '.join(regex.pattern.split())[:60]}", regex.search))
+            for atom, regex in self._regex_atoms
+        ]
+        pattern_atoms = [
+            (atom, stats.wrap(
+                f"通配符:^{match.__self__.pattern}^" if match.__name__ == 'fullmatch' else f"通配符:{match.__self__.pattern}",
+                match
+            ), gates)
+            for atom, match, gates in self._pattern_atoms
+        ]
+        atom_names = [(atom, f'原子:{token}') for (kind, token), atom in self._atoms.items() if kind != 'regex']
+
+        def hits(text):
+            found = scan(text)
+            found.update(self._exact.get(text, ()))
+            for atom, search in regex_atoms:
+                if search(text):
+                    found.add(atom)
+            for atom, match, gates in pattern_atoms:
+                if found.issuperset(gates) and match(text):
+                    found.add(atom)
+            for atom, name in atom_names:
+                stats.count(name, atom in found)
+            return found
+
+        self._hits = hits
+        self._run = lambda program, found: rule_runs[id(program)](program, found)
+        return stats
+    def uninstrument(self):
+        """关闭规则统计"""
+        self.__dict__.pop('_hits', None)
+        self.__dict__.pop('_run', None)
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # 统计用的包装函数不随对象传递
+        state.pop('_hits', None)
+        state.pop('_run', None)
+        return state
+    def tokenize_batch(self, texts, unique=True):
+        """批量分词，unique 为 True 时只对不同的归一化关键词计算，再按编号回填"""
+        if not unique:
+            return [self.tokenize(text) for text in texts]
+        return classify_unique(
+            texts,
+            lambda uniques: [self.tokenize(text) for text in uniques],
+            normalize=self._normalize
+        )
 
 
 class EnhancedTokenizer(Tokenizer):
@@ -128,20 +286,22 @@ class EnhancedTokenizer(Tokenizer):
             return self._parse_custom_regex(expr[2:-2])
         
         # 原有处理逻辑
-        expr = re.sub(r'\{([^}]+)\}', self._replace_wildcard, expr)
-        expr = re.sub(r'\^([^^]+)\^', r'^\1$', expr)
-        expr = re.sub(r'&', ' AND ', expr)
-        expr = re.sub(r'\|', ' OR ', expr)
-        expr = re.sub(r'-', ' NOT ', expr)
-        return self._build_regex(expr)
+        return super()._parse_expression(expr)
 
     def _parse_custom_regex(self, pattern):
-        """处理自定义正则表达式"""
+        """处理自定义正则表达式：整个正则作为一个原子，每个关键词只执行一次"""
+        flags = 0 if self.case_sensitive else re.IGNORECASE
         try:
             # 自动捕获修饰符并编译正则
-            return re.compile(pattern)
+            regex = re.compile(pattern, flags)
         except re.error as e:
             raise ValueError(f"Invalid custom regex: {pattern}") from e
+        key = ('regex', pattern)
+        atom = self._atoms.get(key)
+        if atom is None:
+            atom = self._atoms[key] = len(self._atoms)
+            self._regex_atoms.append((atom, regex))
+        return (atom,)
 
     def _compile_rules(self, current_dict, path=[]):
         for key, value in current_dict.items():
@@ -152,19 +312,11 @@ class EnhancedTokenizer(Tokenizer):
                 # 处理列表类型的值（多个模式）
                 patterns = value if isinstance(value, list) else [value]
                 for pattern in patterns:
-                    compiled = self._parse_expression(pattern)
                     self.compiled_rules.append({
                         'path': current_path,
-                        'pattern': compiled,
-                        'exclude': self._parse_exclusion(pattern) if not isinstance(compiled, re.Pattern) else []
+                        'program': self._parse_expression(pattern)
                     })
 
-    def _parse_exclusion(self, expr):
-        """排除逻辑处理（不处理自定义正则）"""
-        if isinstance(expr, re.Pattern):
-            return []
-        return super()._parse_exclusion(expr)
-
 # 配置示例
 config = {
         "否定词": {
@@ -206,21 +358,22 @@ config = {
 
 wildcards = {'地址': ['长沙', '东莞']}
 
-# 初始化分词器
-tokenizer = EnhancedTokenizer(config, wildcards, case_sensitive=False)
-
-# 测试用例
-test_cases = [
-    "长沙Java培训",
-    "长沙Java培训多少钱",
-    "Java培训",
-    "Java培训学费",
-    "长沙web培训",
-    "35岁学Java好不好",
-    "28周岁程序员",
-    "二十岁开始编程",
-    "年龄：约25左右"
-]
-
-for case in test_cases:
-    print(f"{case} -> {tokenizer.tokenize(case)}")
\ No newline at end of file
+if __name__ == "__main__":
+    # 初始化分词器
+    tokenizer = EnhancedTokenizer(config, wildcards, case_sensitive=False)
+
+    # 测试用例
+    test_cases = [
+        "长沙Java培训",
+        "长沙Java培训多少钱",
+        "Java培训",
+        "Java培训学费",
+        "长沙web培训",
+        "35岁学Java好不好",
+        "28周岁程序员",
+        "二十岁开始编程",
+        "年龄：约25左右"
+    ]
+
+    for case in test_cases:
+        print(f"{case} -> {tokenizer.tokenize(case)}")
@@ -1,5 +1,8 @@
-import pandas as pd
-import re
+from keyword_engine.cache import CachedClassifier, code_fingerprint, engine_fingerprint, ruleset_hash
+from keyword_engine.dedup import classify_unique
+from keyword_engine.manifest import ChangeManifest
+from keyword_engine.normalize import normalize_keyword
+from keyword_engine.sinks import DEFAULT_FORMAT, RESULT_FORMATS, export_xlsx, write_row_batches
 
 # # 分类规则配置
 # CLASS_RULES = {
@@ -34,39 +37,73 @@ CLASS_RULES = {
     }
 }
 
+# 词根预先归一化，与关键词用同一套规则比较
+NORMALIZED_RULES = {
+    dimension: {name: [normalize_keyword(term) for term in terms] for name, terms in groups.items()}
+    for dimension, groups in CLASS_RULES.items()
+}
+
+def classify_cleaned(cleaned_kw):
+    """对归一化后的关键词打标，返回 (成交意向, 词性分类)"""
+    # 成交意向分类
+    intention = "未分类"
+    for level, terms in NORMALIZED_RULES["成交意向"].items():
+        if any(term in cleaned_kw for term in terms):
+            intention = level
+            break
+    
+    # 词性分类（允许多标签）
+    word_types = []
+    for w_type, terms in NORMALIZED_RULES["词性"].items():
+        if any(term in cleaned_kw for term in terms):
+            word_types.append(w_type)
+    return intention, "|".join(word_types) if word_types else "其他"
+
+def classify_labels(keywords):
+    # 处理空格、全半角、大小写和标点后去重，只对不同的关键词打标再回填
+    return classify_unique(keywords, lambda uniques: [classify_cleaned(kw) for kw in uniques])
+
+def build_cached_classifier(cache=None):
+    """带持久缓存的打标（未命中的关键词整批打标），规则或 keyword_engine 引擎改动后缓存自动失效"""
+    ruleset = ruleset_hash("软件开发", code_fingerprint(classify_cleaned), engine_fingerprint())
+    return CachedClassifier(lambda keyword: classify_cleaned(normalize_keyword(keyword)), ruleset, cache,
+                            normalize=normalize_keyword, batch=classify_labels, decode=tuple)
+
+def to_frame(keywords, labels):
+    import pandas as pd
+
+    return pd.DataFrame({
+        "关键词": keywords,
+        "成交意向": [intention for intention, _ in labels],
+        "词性分类": [word_type for _, word_type in labels],
+    })
+
 def classify_keywords(keywords):
-    results = []
-    for keyword in keywords:
-        # 处理空格和特殊字符
-        cleaned_kw = re.sub(r'\s+', '', keyword)
-        
-        record = {"关键词": keyword}
-        
-        # 成交意向分类
-        intention = "未分类"
-        for level, terms in CLASS_RULES["成交意向"].items():
-            if any(term in cleaned_kw for term in terms):
-                intention = level
-                break
-        record["成交意向"] = intention
-        
-        # 词性分类（允许多标签）
-        word_types = []
-        for w_type, terms in CLASS_RULES["词性"].items():
-            if any(term in cleaned_kw for term in terms):
-                word_types.append(w_type)
-        record["词性分类"] = "|".join(word_types) if word_types else "其他"
-        
-        results.append(record)
-    return pd.DataFrame(results)
+    return to_frame(keywords, classify_labels(keywords))
 
-# 读取数据
-df = pd.read_excel("./keyword/软件开发.xlsx")
-keywords = df["关键词"].tolist()
+if __name__ == "__main__":
+    import argparse
 
-# 执行分类
-classified_df = classify_keywords(keywords)
+    parser = argparse.ArgumentParser(description="软件开发关键词打标")
+    parser.add_argument("--format", choices=RESULT_FORMATS, default=DEFAULT_FORMAT, help="结果文件格式")
+    parser.add_argument("--xlsx", action="store_true", help="另外导出 xlsx")
+    parser.add_argument("--no-cache", action="store_true", help="不查、不写分类结果缓存")
+    args = parser.parse_args()
 
-# 保存结果
-classified_df.to_excel("./result/软件开发.xlsx", index=False)
-print("分类完成，结果已保存到 软件开发.xlsx")
+    # 流式读取 -> 只对新增或改动的行分类 -> 与已存结果合并后连同原表各列逐批追加写出
+    source, output = "./keyword/软件开发.xlsx", f"./result/软件开发.{args.format}"
+    with ChangeManifest() as manifest:
+        stats = manifest.update_file(
+            source, output,
+            ruleset=ruleset_hash(code_fingerprint(classify_cleaned), engine_fingerprint()),
+            classify_many=classify_labels if args.no_cache else build_cached_classifier().classify_many,
+            write=lambda header, batches: write_row_batches(
+                output, header, ("成交意向", "词性分类"), batches
+            ),
+        )
+    if stats is None:
+        print("关键词文件和规则均未变化，跳过")
+    else:
+        print(f"分类完成，新分类 {stats['classified']}/{stats['rows']} 行，结果已保存到 {output}")
+    if args.xlsx:
+        export_xlsx(output)